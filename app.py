@@ -1,18 +1,51 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, timedelta
 import json
 import random
-import sqlite3
 import os
+import threading
 from typing import Dict, List
 import uuid
 
+from conversation_logger import ConversationLogger
+from database import ConnectionPool, DatabaseManager, keyset_page
+from export_stream import EXPORT_FORMATS, conversation_filters, export_chunks
+from knowledge_store import KnowledgeStore
+from query_cache import QueryResultCache
+from response_cache import TTLResponseCache
+from statistics_tracker import StatisticsTracker
+
 app = Flask(__name__)
 app.secret_key = 'ai_student_chatbot_secret_2024'
 CORS(app, supports_credentials=True)
 
-# Enhanced knowledge base
+# Knowledge is served from the intents/responses tables of this database and
+# reloaded within KNOWLEDGE_POLL_INTERVAL seconds of any change
+KNOWLEDGE_DB = os.environ.get('CHATBOT_KNOWLEDGE_DB', 'chatbot.db')
+KNOWLEDGE_POLL_INTERVAL = float(os.environ.get('CHATBOT_KNOWLEDGE_POLL_INTERVAL', 5))
+
+# Optional intent classifier and entity extraction for /api/chat. When a model
+# directory is set, concurrent chat queries are collected for up to
+# CHAT_BATCH_MAX_WAIT_MS or CHAT_BATCH_MAX_SIZE queries and classified and
+# run through NER as one batch (see micro_batcher.py)
+CLASSIFIER_MODEL = os.environ.get('CHATBOT_CLASSIFIER_MODEL', '')
+CLASSIFIER_NER_WORKERS = int(os.environ.get('CHATBOT_NER_WORKERS', 0))
+CHAT_BATCH_MAX_WAIT_MS = float(os.environ.get('CHATBOT_BATCH_MAX_WAIT_MS', 5))
+CHAT_BATCH_MAX_SIZE = int(os.environ.get('CHATBOT_BATCH_MAX_SIZE', 32))
+
+# Optional model registry (see model_registry.py). When set, every worker runs
+# a RegistryWatcher that checks the registry's active version every
+# MODEL_REGISTRY_INTERVAL seconds and swaps it into the classifier once it
+# passes its canary queries. The classifier starts from CLASSIFIER_MODEL, or
+# the default model directory if that is unset
+MODEL_REGISTRY = os.environ.get('CHATBOT_MODEL_REGISTRY', '')
+MODEL_REGISTRY_INTERVAL = float(os.environ.get('CHATBOT_MODEL_REGISTRY_INTERVAL', 10))
+
+# Longest a request waits for the write-behind conversation log to catch up
+LOGGER_FLUSH_TIMEOUT = 2.0
+
+# Enhanced knowledge base, imported into KNOWLEDGE_DB when it has none yet
 KNOWLEDGE_BASE = {
     "academics": {
         "exams": {
@@ -114,11 +147,66 @@ KNOWLEDGE_BASE = {
 
 class ChatbotAI:
     def __init__(self):
+        self.query_cache = QueryResultCache(maxsize=1024)
+        
+        # Requests read an in-memory snapshot; edits are picked up by a watcher
+        self.knowledge = KnowledgeStore(DatabaseManager(KNOWLEDGE_DB), on_swap=self.on_knowledge_swap)
+        self.knowledge.seed(KNOWLEDGE_BASE)
+        self.knowledge.start_watching(KNOWLEDGE_POLL_INTERVAL)
+        self.db_pool = ConnectionPool('chatbot_ai.db')
         self.init_database()
+        
+        # Conversations are written behind the request by a background thread
+        self.conversation_logger = ConversationLogger(
+            'chatbot_ai.db',
+            '''INSERT INTO conversations 
+               (session_id, query, response, category, subcategory, confidence, sentiment)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            flush_size=100,
+            flush_interval=0.5,
+            max_queue_size=10000,
+            connect=self.db_pool.new_connection
+        )
+        
+        # Statistics are kept up to date by a trigger on the conversations table
+        self.statistics = StatisticsTracker()
+        self.statistics.install(self.db_pool.connect())
+        self.statistics.start_maintenance(lambda: self.statistics.prune(self.db_pool.connect()), interval=300)
+        
+        self.model = None
+        self.batcher = None
+        self.registry_watcher = None
+        if CLASSIFIER_MODEL or MODEL_REGISTRY:
+            self.init_classifier(CLASSIFIER_MODEL or 'chatbot_model')
+        if MODEL_REGISTRY:
+            self.init_registry_watcher(MODEL_REGISTRY)
+    
+    def init_classifier(self, model_path: str):
+        """Load the intent classifier and batch chat queries through it"""
+        # Imported here so deployments without the classifier never load NumPy
+        from chatbot_model import ChatbotModel
+        from micro_batcher import MicroBatcher
+        
+        self.model = ChatbotModel(model_path=model_path, startup='background', engine='numpy',
+                                  ner_workers=CLASSIFIER_NER_WORKERS)
+        self.batcher = MicroBatcher(self.answer_queries, max_wait=CHAT_BATCH_MAX_WAIT_MS / 1000,
+                                    max_batch=CHAT_BATCH_MAX_SIZE, name='chat-batcher')
+    
+    def init_registry_watcher(self, registry_path: str):
+        """Follow a model registry's active version in this worker"""
+        from model_registry import ModelRegistry, RegistryWatcher
+        
+        self.registry_watcher = RegistryWatcher(self.model, ModelRegistry(registry_path),
+                                                interval=MODEL_REGISTRY_INTERVAL)
+        self.registry_watcher.start()
+    
+    def on_knowledge_swap(self, snapshot):
+        """Drop analyses made against earlier knowledge"""
+        self.query_cache.clear()
     
     def init_database(self):
         """Initialize database with required tables"""
-        conn = sqlite3.connect('chatbot_ai.db')
+        conn = self.db_pool.connect()
         c = conn.cursor()
         
         # Conversations table
@@ -143,19 +231,20 @@ class ChatbotAI:
                 )''')
         
         # Create indexes
-        c.execute('CREATE INDEX IF NOT EXISTS idx_session ON conversations(session_id)')
+        # (session_id, timestamp) also serves plain session lookups
+        c.execute('DROP INDEX IF EXISTS idx_session')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_session_timestamp ON conversations(session_id, timestamp)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON conversations(timestamp)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_category ON conversations(category)')
         
         conn.commit()
-        conn.close()
         
         # Initialize sample data if empty
         self.initialize_sample_data()
     
     def initialize_sample_data(self):
         """Initialize with sample conversations"""
-        conn = sqlite3.connect('chatbot_ai.db')
+        conn = self.db_pool.connect()
         c = conn.cursor()
         
         # Check if we have data
@@ -184,12 +273,23 @@ class ChatbotAI:
             print("✅ Sample data initialized in database")
         
         conn.commit()
-        conn.close()
     
-    def analyze_query(self, query: str) -> Dict:
+    def analyze_query(self, query: str, snapshot=None) -> Dict:
         """Analyze user query to determine intent"""
+        snapshot = snapshot or self.knowledge.snapshot
         query_lower = query.lower().strip()
         
+        # Keyed by version too, so a result racing a swap is never served later
+        key = (snapshot.version, query_lower)
+        result = self.query_cache.get(key)
+        if result is None:
+            result = self._analyze_normalized(query_lower, snapshot)
+            self.query_cache.put(key, result)
+        
+        return dict(result, matched_patterns=list(result["matched_patterns"]))
+    
+    def _analyze_normalized(self, query_lower: str, snapshot) -> Dict:
+        """Analyze an already lowercased and stripped query"""
         # Default values
         result = {
             "category": "support",
@@ -199,15 +299,13 @@ class ChatbotAI:
             "matched_patterns": []
         }
         
-        # Check each category and subcategory
-        for category, subcats in KNOWLEDGE_BASE.items():
-            for subcategory, data in subcats.items():
-                for pattern in data['patterns']:
-                    if pattern in query_lower:
-                        result["matched_patterns"].append(pattern)
-                        result["category"] = category
-                        result["subcategory"] = subcategory
-                        result["confidence"] = min(0.95, result["confidence"] + 0.2)
+        # Scan the query once; hits come back in knowledge base order
+        for index in snapshot.matcher.find_all(query_lower):
+            intent = snapshot.pattern_targets[index]
+            result["matched_patterns"].append(snapshot.matcher.patterns[index])
+            result["category"] = intent.category
+            result["subcategory"] = intent.subcategory
+            result["confidence"] = min(0.95, result["confidence"] + 0.2)
         
         # Adjust confidence based on number of matches
         if len(result["matched_patterns"]) > 0:
@@ -229,14 +327,13 @@ class ChatbotAI:
         
         return result
     
-    def generate_response(self, analysis: Dict) -> str:
+    def generate_response(self, analysis: Dict, snapshot=None) -> str:
         """Generate response based on analysis"""
-        category = analysis["category"]
-        subcategory = analysis["subcategory"]
+        snapshot = snapshot or self.knowledge.snapshot
+        intent = snapshot.lookup(analysis["category"], analysis["subcategory"])
         
-        if category in KNOWLEDGE_BASE and subcategory in KNOWLEDGE_BASE[category]:
-            responses = KNOWLEDGE_BASE[category][subcategory]['responses']
-            response = random.choice(responses)
+        if intent is not None and intent.responses:
+            response = random.choice(intent.responses)
             
             # Add sentiment-based closing
             if analysis["sentiment"] == "positive":
@@ -256,95 +353,120 @@ class ChatbotAI:
     
     def process_query(self, query: str, session_id: str) -> Dict:
         """Process a user query and return response"""
-        # Analyze query
-        analysis = self.analyze_query(query)
-        
-        # Generate response
-        response = self.generate_response(analysis)
+        result = self.answer_query(query)
         
         # Store in database
-        self.store_conversation(session_id, query, response, analysis)
-        
-        return {
-            "response": response,
-            "category": analysis["category"],
-            "subcategory": analysis["subcategory"],
-            "confidence": analysis["confidence"],
-            "sentiment": analysis["sentiment"],
-            "matched_patterns": analysis["matched_patterns"],
-            "timestamp": datetime.now().isoformat()
-        }
+        self.store_conversation(session_id, query, result["response"], result)
+        
+        return result
     
-    def store_conversation(self, session_id: str, query: str, response: str, analysis: Dict):
-        """Store conversation in database"""
-        try:
-            conn = sqlite3.connect('chatbot_ai.db')
-            c = conn.cursor()
+    def answer_query(self, query: str) -> Dict:
+        """Analyze a query and generate its response without storing it"""
+        if self.batcher is not None:
+            # Waits for the batch this query joins
+            return self.batcher.process(query)
+        return self.answer_queries([query])[0]
+    
+    def answer_queries(self, queries: List[str]) -> List[Dict]:
+        """Analyze a batch of queries; the classifier and NER see the whole batch at once"""
+        # One snapshot for the whole batch, even if knowledge is swapped meanwhile
+        snapshot = self.knowledge.snapshot
+        
+        if self.model is not None:
+            classified = self.model.process_queries(queries)
+        else:
+            classified = [None] * len(queries)
+        
+        results = []
+        for query, model_result in zip(queries, classified):
+            # Analyze query
+            analysis = self.analyze_query(query, snapshot)
             
-            c.execute('''INSERT INTO conversations 
-                        (session_id, query, response, category, subcategory, confidence, sentiment)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                     (session_id, query, response, analysis["category"], 
-                      analysis["subcategory"], analysis["confidence"], analysis["sentiment"]))
+            # Generate response
+            response = self.generate_response(analysis, snapshot)
             
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error storing conversation: {e}")
+            result = {
+                "response": response,
+                "category": analysis["category"],
+                "subcategory": analysis["subcategory"],
+                "confidence": analysis["confidence"],
+                "sentiment": analysis["sentiment"],
+                "matched_patterns": analysis["matched_patterns"],
+                "timestamp": datetime.now().isoformat()
+            }
+            if model_result is not None:
+                intent, intent_confidence, _, entities = model_result
+                result["intent"] = str(intent)
+                result["intent_confidence"] = float(intent_confidence)
+                result["entities"] = entities
+            results.append(result)
+        
+        return results
+    
+    def store_conversation(self, session_id: str, query: str, response: str, analysis: Dict):
+        """Queue conversation for the background database writer"""
+        self.conversation_logger.log(
+            (session_id, query, response, analysis["category"],
+             analysis["subcategory"], analysis["confidence"], analysis["sentiment"])
+        )
+    
+    def get_history(self, session_id: str = None, limit: int = 50, cursor: str = None) -> Dict:
+        """Get one page of stored conversations, newest first"""
+        rows, next_cursor = keyset_page(
+            self.db_pool.connect(),
+            'SELECT id, session_id, query, response, category, subcategory, confidence, sentiment, timestamp FROM conversations',
+            ['session_id = ?'] if session_id else [],
+            [session_id] if session_id else [],
+            limit, cursor
+        )
+        return {"conversations": rows, "next_cursor": next_cursor}
+    
+    def export_conversations(self, format: str = 'ndjson', start: str = None, end: str = None,
+                             session_id: str = None, chunk_size: int = 1000):
+        """Validate export filters and return a generator of NDJSON or CSV chunks"""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        
+        where, params = conversation_filters(start, end, session_id)
+        sql = 'SELECT id, session_id, query, response, category, subcategory, confidence, sentiment, timestamp FROM conversations'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY timestamp, id'
+        
+        # Include conversations still waiting in the write-behind queue, but
+        # never hold the export back for long
+        if not self.conversation_logger.flush(timeout=LOGGER_FLUSH_TIMEOUT):
+            print("Warning: conversation log did not drain; export may miss the newest conversations")
+        
+        def chunks():
+            conn = self.db_pool.new_connection()
+            try:
+                yield from export_chunks(conn, sql, params, format, chunk_size)
+            finally:
+                conn.close()
+        
+        return chunks()
     
     def get_statistics(self) -> Dict:
         """Get comprehensive statistics"""
         try:
-            conn = sqlite3.connect('chatbot_ai.db')
-            c = conn.cursor()
+            stats = self.statistics.snapshot(self.db_pool.connect())
             
-            # Total conversations
-            c.execute('SELECT COUNT(*) FROM conversations')
-            total_queries = c.fetchone()[0] or 0
+            total_queries = stats["total"]
+            unique_users = stats["unique_sessions"] or 1
             
-            # Unique sessions (last 30 days)
-            c.execute('''SELECT COUNT(DISTINCT session_id) FROM conversations 
-                        WHERE timestamp >= datetime('now', '-30 days')''')
-            unique_users = c.fetchone()[0] or 1
-            
-            # Average confidence
-            c.execute('SELECT AVG(confidence) FROM conversations WHERE confidence IS NOT NULL')
-            avg_conf = c.fetchone()[0]
+            avg_conf = stats["confidence_sum"] / stats["confidence_count"] if stats["confidence_count"] else None
             avg_confidence = round(float(avg_conf or 0.85), 3)
             
-            # Recent activity (last 24 hours)
-            c.execute('''SELECT COUNT(*) FROM conversations 
-                        WHERE timestamp >= datetime('now', '-1 day')''')
-            recent_activity = c.fetchone()[0] or 0
-            
-            # Today's activity
-            c.execute('''SELECT COUNT(*) FROM conversations 
-                        WHERE DATE(timestamp) = DATE('now')''')
-            today_activity = c.fetchone()[0] or 0
-            
-            # Category distribution
-            c.execute('''SELECT category, COUNT(*) as count 
-                        FROM conversations 
-                        WHERE category IS NOT NULL 
-                        GROUP BY category 
-                        ORDER BY count DESC''')
-            category_data = c.fetchall()
-            
-            # Most common queries
-            c.execute('''SELECT query, COUNT(*) as frequency 
-                        FROM conversations 
-                        GROUP BY query 
-                        ORDER BY frequency DESC 
-                        LIMIT 5''')
-            common_queries = c.fetchall()
+            recent_activity = stats["recent"]
+            today_activity = stats["today"]
+            category_data = stats["categories"]
+            common_queries = stats["common_queries"]
             
             # Success rate (based on confidence > 0.7)
-            c.execute('''SELECT COUNT(*) FROM conversations WHERE confidence >= 0.7''')
-            successful = c.fetchone()[0] or 0
+            successful = stats["successful"]
             success_rate = round((successful / total_queries * 100) if total_queries > 0 else 95, 1)
             
-            conn.close()
-            
             return {
                 "success": True,
                 "total_queries": total_queries,
@@ -392,7 +514,29 @@ class ChatbotAI:
             }
 
 # Initialize chatbot
-chatbot = ChatbotAI()
+# With CHATBOT_LAZY_INIT=1 (set by wsgi.py) the database setup and sample
+# seeding run on first use instead of at import time
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+def get_chatbot() -> ChatbotAI:
+    """Get the shared chatbot, creating it on first use"""
+    global _chatbot
+    if _chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                _chatbot = ChatbotAI()
+    return _chatbot
+
+def chatbot_initialized() -> bool:
+    return _chatbot is not None
+
+if os.environ.get('CHATBOT_LAZY_INIT', '0') != '1':
+    get_chatbot()
+
+# Statistics are shared by every polling client for a few seconds
+STATISTICS_CACHE_TTL = float(os.environ.get('STATISTICS_CACHE_TTL', 10))
+statistics_cache = TTLResponseCache(lambda: get_chatbot().get_statistics(), ttl=STATISTICS_CACHE_TTL)
 
 @app.route('/')
 def home():
@@ -416,7 +560,7 @@ def chat():
             }), 400
         
         # Process query
-        result = chatbot.process_query(query, session_id)
+        result = get_chatbot().process_query(query, session_id)
         result["session_id"] = session_id
         
         return jsonify(result)
@@ -433,8 +577,30 @@ def chat():
 @app.route('/api/statistics', methods=['GET'])
 def statistics():
     """Get chatbot statistics"""
-    stats = chatbot.get_statistics()
-    return jsonify(stats)
+    cached = statistics_cache.get()
+    
+    response = app.response_class(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    response.cache_control.no_cache = True
+    
+    # Answers 304 Not Modified when the client's validators still match
+    return response.make_conditional(request)
+
+@app.route('/api/history', methods=['GET'])
+def history():
+    """Get conversation history; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        page = get_chatbot().get_history(
+            session_id=request.args.get('session_id') or None,
+            limit=limit,
+            cursor=request.args.get('cursor') or None
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    return jsonify(dict(page, success=True, count=len(page["conversations"])))
 
 @app.route('/api/suggestions', methods=['GET'])
 def suggestions():
@@ -442,9 +608,8 @@ def suggestions():
     category = request.args.get('category', 'academics')
     
     suggestions_list = []
-    if category in KNOWLEDGE_BASE:
-        for subcat in KNOWLEDGE_BASE[category]:
-            suggestions_list.extend(KNOWLEDGE_BASE[category][subcat]['patterns'][:2])
+    for intent in get_chatbot().knowledge.snapshot.categories.get(category, {}).values():
+        suggestions_list.extend(intent.patterns[:2])
     
     # Add some general suggestions
     general_suggestions = [
@@ -485,27 +650,55 @@ def quick_actions():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return jsonify(health_payload())
+
+def health_payload() -> Dict:
+    """Health details shared by the WSGI and ASGI servers"""
+    return {
         "status": "healthy",
         "service": "AI Student Chatbot",
         "version": "2.0.0",
         "timestamp": datetime.now().isoformat(),
-        "database": "connected" if os.path.exists('chatbot_ai.db') else "not_found"
-    })
+        "database": "connected" if os.path.exists('chatbot_ai.db') else "not_found",
+        "initialized": chatbot_initialized(),
+        "query_cache": get_chatbot().query_cache.get_stats() if chatbot_initialized() else None,
+        "knowledge": get_chatbot().knowledge.get_stats() if chatbot_initialized() else None,
+        "micro_batcher": get_chatbot().batcher.get_metrics() if chatbot_initialized() and get_chatbot().batcher else None,
+        "model_registry": (get_chatbot().registry_watcher.get_stats()
+                           if chatbot_initialized() and get_chatbot().registry_watcher else None)
+    }
 
-@app.route('/api/export', methods=['POST'])
+@app.route('/api/export', methods=['GET', 'POST'])
 def export_conversations():
-    """Export conversation history (placeholder)"""
-    return jsonify({
-        "success": True,
-        "message": "Export feature coming soon!",
-        "features": [
-            "Export as PDF",
-            "Export as CSV",
-            "Export as JSON",
-            "Schedule automatic exports"
-        ]
-    })
+    """Stream conversations as NDJSON or CSV, filtered by date range and session"""
+    options = request.args.to_dict()
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if body is not None and not isinstance(body, dict):
+            return jsonify({"success": False, "error": "Request body must be a JSON object"}), 400
+        options.update(body or {})
+    
+    for name in ('format', 'start', 'end', 'session_id'):
+        if options.get(name) is not None and not isinstance(options[name], str):
+            return jsonify({"success": False, "error": f"'{name}' must be a string"}), 400
+    
+    export_format = options.get('format', 'ndjson')
+    try:
+        chunks = get_chatbot().export_conversations(
+            format=export_format,
+            start=options.get('start') or None,
+            end=options.get('end') or None,
+            session_id=options.get('session_id') or None
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename=conversations.{extension}"}
+    )
 
 if __name__ == '__main__':
     print("\n" + "="*60)
@@ -520,7 +713,7 @@ if __name__ == '__main__':
     # Check database
     if not os.path.exists('chatbot_ai.db'):
         print("⚠️  Database not found. Initializing...")
-        chatbot.init_database()
+        get_chatbot().init_database()
         print("✅ Database initialized successfully!")
     
     # Run the app
@@ -0,0 +1,259 @@
+"""
+Asyncio serving mode
+
+    uvicorn asgi:app --workers 4
+
+/api/chat, /api/statistics and /api/health are served directly on the event
+loop. Query analysis runs in a thread pool and conversation logging goes
+through a bounded asyncio queue, so waiting connections cost a coroutine
+rather than a thread. Every other route is delegated to the Flask app.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime, parsedate_to_datetime
+
+os.environ.setdefault('CHATBOT_LAZY_INIT', '1')
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, chatbot_initialized, get_chatbot, health_payload, statistics_cache
+
+ANALYSIS_WORKERS = int(os.environ.get('CHATBOT_ANALYSIS_WORKERS', 8))
+LOG_QUEUE_SIZE = int(os.environ.get('CHATBOT_LOG_QUEUE_SIZE', 10000))
+LOG_BATCH_SIZE = 100
+MAX_BODY_BYTES = 64 * 1024
+
+
+class ChatASGIApp:
+    """ASGI application serving the hot chat routes natively"""
+
+    def __init__(self, wsgi_app, analysis_workers=ANALYSIS_WORKERS, log_queue_size=LOG_QUEUE_SIZE):
+        """
+        Create the application
+
+        Args:
+            wsgi_app: Flask app handling every other route
+            analysis_workers: Threads used for query analysis
+            log_queue_size: Conversations buffered before chat handlers wait
+        """
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.analysis_workers = analysis_workers
+        self.log_queue_size = log_queue_size
+        self.executor = None
+        self.log_queue = None
+        self.log_task = None
+        self.routes = {
+            ('POST', '/api/chat'): self.chat,
+            ('GET', '/api/statistics'): self.statistics,
+            ('GET', '/api/health'): self.health
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http':
+            handler = self.routes.get((scope['method'], scope['path']))
+            if handler is not None:
+                self.start()
+                await handler(scope, receive, send)
+                return
+
+        await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                # Build the chatbot before the server reports itself ready
+                await asyncio.get_running_loop().run_in_executor(self.executor, get_chatbot)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start(self):
+        """Create the thread pool and log queue on the running loop"""
+        if self.log_task is not None:
+            return
+        self.executor = ThreadPoolExecutor(max_workers=self.analysis_workers, thread_name_prefix='chat-analysis')
+        self.log_queue = asyncio.Queue(maxsize=self.log_queue_size)
+        self.log_task = asyncio.get_running_loop().create_task(self._drain_log_queue())
+
+    async def stop(self):
+        """Write every queued conversation and release the thread pool"""
+        if self.log_task is None:
+            return
+        await self.log_queue.join()
+        self.log_task.cancel()
+        self.log_task = None
+        await asyncio.get_running_loop().run_in_executor(self.executor, get_chatbot().conversation_logger.flush)
+        self.executor.shutdown(wait=True)
+
+    async def _drain_log_queue(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.log_queue.get()]
+            while len(batch) < LOG_BATCH_SIZE and not self.log_queue.empty():
+                batch.append(self.log_queue.get_nowait())
+            try:
+                await loop.run_in_executor(self.executor, self._store_batch, batch)
+            except Exception as e:
+                print(f"Error storing conversations: {e}")
+            finally:
+                for _ in batch:
+                    self.log_queue.task_done()
+
+    def _store_batch(self, batch):
+        chatbot = get_chatbot()
+        for session_id, query, result in batch:
+            chatbot.store_conversation(session_id, query, result["response"], result)
+
+    async def chat(self, scope, receive, send):
+        """Handle chat requests"""
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_json(scope, send, 413, {"response": "⚠️ Message too large.", "category": "error", "confidence": 0.0})
+            return
+
+        try:
+            data = json.loads(body or b'{}')
+            if not isinstance(data, dict):
+                raise ValueError("Request body must be a JSON object")
+        except ValueError:
+            await self._send_json(scope, send, 400, {"response": "⚠️ Invalid request.", "category": "error", "confidence": 0.0})
+            return
+
+        session_id = data.get('session_id', str(uuid.uuid4()))
+
+        try:
+            query = str(data.get('message', '')).strip()
+
+            if not query:
+                await self._send_json(scope, send, 400, {
+                    "response": "⚠️ Please enter a message.",
+                    "category": "error",
+                    "confidence": 0.0,
+                    "session_id": session_id
+                })
+                return
+
+            # Analysis runs off the event loop; logging waits only if the queue is full
+            chatbot = get_chatbot() if chatbot_initialized() else None
+            if chatbot is not None and chatbot.batcher is not None:
+                # Joins the classifier batch without holding a pool thread
+                result = await asyncio.wrap_future(chatbot.batcher.submit(query))
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, lambda: get_chatbot().answer_query(query)
+                )
+            await self.log_queue.put((session_id, query, result))
+            result["session_id"] = session_id
+
+            await self._send_json(scope, send, 200, result)
+
+        except Exception as e:
+            print(f"Error in chat endpoint: {e}")
+            await self._send_json(scope, send, 500, {
+                "response": "⚠️ Sorry, I encountered an error processing your request. Please try again.",
+                "category": "error",
+                "confidence": 0.0,
+                "session_id": session_id
+            })
+
+    async def statistics(self, scope, receive, send):
+        """Get chatbot statistics, answering 304 when the client is up to date"""
+        cached = await asyncio.get_running_loop().run_in_executor(self.executor, statistics_cache.get)
+
+        headers = [
+            (b'etag', f'"{cached.etag}"'.encode('latin-1')),
+            (b'last-modified', format_datetime(cached.last_modified, usegmt=True).encode('latin-1')),
+            (b'cache-control', b'no-cache')
+        ]
+
+        if self._not_modified(scope, cached):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers + self._cors_headers(scope)})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        await self._send_body(scope, send, 200, cached.body.encode('utf-8'), headers)
+
+    async def health(self, scope, receive, send):
+        """Health check endpoint"""
+        await self._send_json(scope, send, 200, health_payload())
+
+    @staticmethod
+    def _header(scope, name):
+        for key, value in scope.get('headers', []):
+            if key == name:
+                return value.decode('latin-1')
+        return None
+
+    def _not_modified(self, scope, cached):
+        if_none_match = self._header(scope, b'if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')]
+            return '*' in tags or cached.etag in tags
+
+        if_modified_since = self._header(scope, b'if-modified-since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since) >= cached.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _cors_headers(self, scope):
+        # Same behaviour as flask_cors with supports_credentials=True
+        origin = self._header(scope, b'origin')
+        if not origin:
+            return []
+        return [
+            (b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin')
+        ]
+
+    @staticmethod
+    async def _read_body(receive):
+        """Read the request body, or None if it exceeds MAX_BODY_BYTES"""
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    async def _send_json(self, scope, send, status, payload):
+        await self._send_body(scope, send, status, json.dumps(payload, default=str).encode('utf-8'))
+
+    async def _send_body(self, scope, send, status, body, headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                *headers,
+                *self._cors_headers(scope)
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = ChatASGIApp(flask_app)
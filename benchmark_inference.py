@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pure-NumPy inference engine
+
+Times the scikit-learn pipeline and NumpyIntentClassifier, loaded from the
+model artifact, on the training corpus, sample queries and random
+vocabulary mixes, one query at a time and as one batch. Parity between the
+engines is covered by tests/test_inference_engine.py.
+"""
+
+import random
+import timeit
+
+from chatbot_model import ChatbotModel
+from inference_engine import NumpyIntentClassifier
+from model_artifact import load_artifact
+
+
+def build_corpus(model, samples=500, seed=42):
+    """Preprocessed texts covering known patterns, unseen words and empty input"""
+    rng = random.Random(seed)
+    patterns = [pattern for data in model.training_data.values() for pattern in data['patterns']]
+    queries = patterns + [
+        "when is the exam?",
+        "how to pay semester fees?",
+        "what is the weather today?",
+        "library library library timings",
+        "",
+        "zzz qqq"
+    ]
+
+    terms = list(model.vectorizer.vocabulary_)
+    for _ in range(samples):
+        words = ' '.join(rng.choice(terms) for _ in range(rng.randint(1, 6)))
+        queries.append(words)
+
+    return [model.preprocess_text(query) for query in queries]
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("NUMPY INFERENCE BENCHMARK")
+    print("=" * 60)
+
+    model = ChatbotModel(startup='lazy')
+    model.wait_until_ready(components=['nltk', 'classifier'])
+    pipeline = model.model
+    corpus = build_corpus(model)
+
+    engine = NumpyIntentClassifier.from_artifact(load_artifact(model.model_path))
+    single = corpus[:50]
+    number = 20
+
+    def per_query(function):
+        return min(timeit.repeat(lambda: [function([text]) for text in single], number=number, repeat=5))
+
+    def batched(function):
+        return min(timeit.repeat(lambda: function(corpus), number=number, repeat=5))
+
+    print(f"\n{'Mode':<22}{'sklearn µs':>12}{'numpy µs':>12}{'Speedup':>10}")
+    print("-" * 56)
+    for mode, timer, count in [('single query', per_query, len(single)), ('batch', batched, len(corpus))]:
+        sk = timer(pipeline.predict_proba) / (number * count) * 1e6
+        np_time = timer(engine.predict_proba) / (number * count) * 1e6
+        print(f"{mode:<22}{sk:>12.2f}{np_time:>12.2f}{sk / np_time:>9.1f}x")
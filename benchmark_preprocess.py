@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass preprocessor against the NLTK reference path
+
+Times ChatbotModel.preprocess_text, preprocess_text_nltk and the memoized
+mode on the training corpus plus noisy variants. Token parity between the
+paths is covered by tests/test_preprocess.py.
+"""
+
+import json
+import os
+import timeit
+
+from chatbot_model import ChatbotModel, TOKEN_SPLITS
+
+
+def build_corpus(model):
+    """Collect training patterns, sample queries and noisy variants"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'training_data.json')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            training_data = json.load(f)
+    else:
+        training_data = model.get_default_training_data()
+
+    corpus = [pattern for data in training_data.values() for pattern in data['patterns']]
+    corpus += [
+        "When is the EXAM?!",
+        "how to pay semester fees??? (urgent)",
+        "Library timings on 25th Dec, 2024",
+        "I cannot find my hall-ticket",
+        "gonna need the bus schedule, wanna know",
+        "gimme the fee structure lemme check gotta go",
+        "café menu — hostel food ✓",
+        "   multiple    spaces\tand\nnewlines   ",
+        "",
+        "a an the",
+        12345
+    ]
+    corpus += [text.upper() for text in corpus if isinstance(text, str)]
+    corpus += [' '.join(TOKEN_SPLITS) + ' cannot.']
+    return corpus
+
+
+def time_path(function, corpus, number):
+    return min(timeit.repeat(lambda: [function(text) for text in corpus], number=number, repeat=5))
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("PREPROCESSING BENCHMARK")
+    print("=" * 60)
+
+    model = ChatbotModel(startup='lazy')
+    memoized = ChatbotModel(startup='lazy', preprocess_cache_size=4096)
+    corpus = build_corpus(model)
+
+    number = 50
+    reference_time = time_path(model.preprocess_text_nltk, corpus, number)
+    fast_time = time_path(model.preprocess_text, corpus, number)
+    memoized_time = time_path(memoized.preprocess_text, corpus, number)
+
+    calls = len(corpus) * number
+    print(f"\n{'Path':<12}{'µs/text':>10}{'Speedup':>10}")
+    print("-" * 32)
+    for name, elapsed in [('nltk', reference_time), ('fast', fast_time), ('memoized', memoized_time)]:
+        print(f"{name:<12}{elapsed / calls * 1e6:>10.2f}{reference_time / elapsed:>9.1f}x")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the chatbot services
+
+Two views of worker startup, each measured in fresh interpreters:
+
+1. `python -X importtime` for each entry module, grouped by top-level
+   package so the heavy dependencies stand out.
+2. Wall-clock init phases: importing the module, building the chatbot and
+   serving the first requests, for app.py, the slim wsgi.py entry point and
+   ChatbotModel in each startup mode.
+
+Everything runs in a scratch directory so the tracked databases and model
+files are never modified.
+
+    python benchmark_startup.py --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Copied into the scratch directory so relative paths resolve as in production
+FIXTURES = ['data', 'chatbot_model', 'chatbot_model.pkl']
+
+IMPORT_TARGETS = [
+    ('app', {'CHATBOT_LAZY_INIT': '0'}),
+    ('wsgi', {'CHATBOT_WARMUP': '0'}),
+    ('chatbot_model', {}),
+    ('database', {})
+]
+
+PHASE_SCRIPTS = {
+    'app': '''
+import time
+phases = {}
+t = time.perf_counter()
+import flask
+phases['import flask'] = time.perf_counter() - t
+t = time.perf_counter()
+import app
+phases['import app (creates ChatbotAI)'] = time.perf_counter() - t
+client = app.app.test_client()
+t = time.perf_counter()
+client.get('/api/health')
+phases['first /api/health'] = time.perf_counter() - t
+t = time.perf_counter()
+client.post('/api/chat', json={'message': 'exam schedule', 'session_id': 'bench'})
+phases['first /api/chat'] = time.perf_counter() - t
+''',
+    'wsgi': '''
+import time
+phases = {}
+t = time.perf_counter()
+import flask
+phases['import flask'] = time.perf_counter() - t
+t = time.perf_counter()
+import wsgi
+phases['import wsgi'] = time.perf_counter() - t
+client = wsgi.app.test_client()
+t = time.perf_counter()
+client.get('/api/health')
+phases['first /api/health'] = time.perf_counter() - t
+t = time.perf_counter()
+client.post('/api/chat', json={'message': 'exam schedule', 'session_id': 'bench'})
+phases['first /api/chat (creates ChatbotAI)'] = time.perf_counter() - t
+''',
+    'chatbot_model': '''
+import time
+phases = {}
+t = time.perf_counter()
+import chatbot_model
+phases['import chatbot_model'] = time.perf_counter() - t
+for mode in ('eager', 'background', 'lazy'):
+    t = time.perf_counter()
+    model = chatbot_model.ChatbotModel(startup=mode)
+    phases[f'{mode}: construct'] = time.perf_counter() - t
+    t = time.perf_counter()
+    model.process_query('when is the exam?')
+    phases[f'{mode}: first process_query'] = time.perf_counter() - t
+'''
+}
+
+PHASE_FOOTER = '''
+import json, sys
+sys.stdout.write('\\n@@PHASES@@' + json.dumps(phases))
+'''
+
+
+def make_scratch_dir():
+    scratch = tempfile.mkdtemp(prefix='chatbot-startup-')
+    for name in FIXTURES:
+        source = os.path.join(ROOT, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(scratch, name))
+        elif os.path.isfile(source):
+            shutil.copy2(source, scratch)
+    return scratch
+
+
+def run_python(args, env_overrides, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='1', **env_overrides)
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env,
+                          capture_output=True, text=True)
+
+
+def parse_importtime(stderr):
+    """
+    Group `-X importtime` self times by top-level package
+
+    Returns:
+        (dictionary of package -> self microseconds, total microseconds)
+    """
+    by_package = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        by_package[package] = by_package.get(package, 0) + int(self_us)
+        total += int(self_us)
+    return by_package, total
+
+
+def profile_imports(module, env_overrides, scratch, repeat):
+    runs = []
+    for _ in range(repeat):
+        result = run_python(['-X', 'importtime', '-c', f'import {module}'], env_overrides, scratch)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        runs.append(parse_importtime(result.stderr))
+
+    packages = set().union(*(by_package for by_package, _ in runs))
+    median = {package: statistics.median(by_package.get(package, 0) for by_package, _ in runs)
+              for package in packages}
+    return (median, statistics.median(total for _, total in runs)), None
+
+
+def profile_phases(name, repeat):
+    runs = []
+    for _ in range(repeat):
+        # A fresh copy each run so every start is a cold one
+        run_dir = make_scratch_dir()
+        try:
+            result = run_python(['-c', PHASE_SCRIPTS[name] + PHASE_FOOTER], {}, run_dir)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        if result.returncode != 0 or '@@PHASES@@' not in result.stdout:
+            error = (result.stderr.strip().splitlines() or ['no output'])[-1]
+            return None, error
+        runs.append(json.loads(result.stdout.rsplit('@@PHASES@@', 1)[1]))
+
+    return {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}, None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (median is reported)')
+    parser.add_argument('--top', type=int, default=12, help='packages shown per import profile')
+    args = parser.parse_args()
+
+    scratch = make_scratch_dir()
+    try:
+        print("=" * 60)
+        print("IMPORT TIME BY PACKAGE (python -X importtime, self time)")
+        print("=" * 60)
+        for module, env_overrides in IMPORT_TARGETS:
+            profile, error = profile_imports(module, env_overrides, scratch, args.repeat)
+            print(f"\nimport {module}")
+            if error:
+                print(f"  ✗ {error}")
+                continue
+            by_package, total = profile
+            print(f"  {'total':<28}{total / 1000:>10.1f} ms")
+            for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+                print(f"  {package:<28}{self_us / 1000:>10.1f} ms")
+
+        print("\n" + "=" * 60)
+        print("INIT PHASES (wall clock)")
+        print("=" * 60)
+        for name in PHASE_SCRIPTS:
+            phases, error = profile_phases(name, args.repeat)
+            print(f"\n{name}")
+            if error:
+                print(f"  ✗ {error}")
+                continue
+            for phase, seconds in phases.items():
+                print(f"  {phase:<40}{seconds * 1000:>10.1f} ms")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
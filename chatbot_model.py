@@ -1,53 +1,283 @@
 import numpy as np
+import hashlib
 import json
 import re
 import random
 import os
+import threading
+from functools import lru_cache
+import time
 import warnings
+from collections import namedtuple
 warnings.filterwarnings('ignore')
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-import spacy
 import pickle
 
+# nltk, spacy and sklearn are imported where they are first needed, so a
+# serving worker only pays for the parts it actually loads
+
+from entity_service import EntityService, doc_entities, load_ner_pipeline
+from hashing_model import DEFAULT_N_FEATURES, HashingIntentModel
+from inference_engine import NumpyIntentClassifier
+from ner_gate import NERGate
+from pattern_cache import PREPROCESS_VERSION, PatternCache
+from model_artifact import (ArtifactError, build_pipeline, is_artifact, is_hashing, load_artifact, read_content_hash,
+                            save_artifact)
+from query_cache import QueryResultCache
+
+# Runs of ASCII letters; everything else separates tokens
+WORD_RE = re.compile(r'[a-zA-Z]+')
+
+# Whole-word splits NLTK's word_tokenize applies to letter-only text
+TOKEN_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+# Everything process_queries needs from one model version, swapped as a unit
+ServingModel = namedtuple('ServingModel', [
+    'classifier', 'model', 'vectorizer', 'training_data', 'responses',
+    'training_state', 'artifact_hash', 'version'
+])
+
+EMPTY_SERVING = ServingModel(None, None, None, {}, {}, {}, None, None)
+
+
+def build_tfidf_pipeline(max_features=1500, ngram_range=(1, 2), alpha=0.1):
+    """
+    Unfitted TF-IDF + MultinomialNB pipeline as trained by train_model
+    
+    Args:
+        max_features: Vocabulary size cap
+        ngram_range: Smallest and largest n-gram counted
+        alpha: MultinomialNB smoothing
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(
+            max_features=max_features,
+            ngram_range=ngram_range,  # Reduced from (1,3) to prevent memory issues
+            stop_words='english',
+            min_df=1,
+            max_df=0.9
+        )),
+        ('classifier', MultinomialNB(alpha=alpha))
+    ])
+
+
+def _serving_field(name):
+    """Attribute stored in the current ServingModel"""
+    def get(self):
+        return getattr(self._serving, name)
+    
+    def set(self, value):
+        self._serving = self._serving._replace(**{name: value})
+    
+    return property(get, set)
+
 class ChatbotModel:
-    def __init__(self, model_path='chatbot_model.pkl', retrain=False):
+    # Components that can be loaded independently of each other
+    COMPONENTS = ('nltk', 'spacy', 'classifier')
+    
+    classifier = _serving_field('classifier')
+    model = _serving_field('model')
+    vectorizer = _serving_field('vectorizer')
+    training_data = _serving_field('training_data')
+    responses = _serving_field('responses')
+    training_state = _serving_field('training_state')
+    artifact_hash = _serving_field('artifact_hash')
+    version = _serving_field('version')
+    
+    def __init__(self, model_path='chatbot_model', retrain=False, startup='eager',
+                 preprocess_cache_size=0, result_cache_size=1024, engine='sklearn',
+                 ner_workers=0, ner_timeout=0.25, ner_gate=True, vectorizer_mode='tfidf',
+                 hashing_features=DEFAULT_N_FEATURES, train_workers=1,
+                 pattern_cache_path='pattern_cache.db'):
         """
         Initialize the chatbot model
         
         Args:
-            model_path: Path to save/load trained model
+            model_path: Model artifact directory to save/load; a legacy
+                chatbot_model.pkl next to it is migrated on first load
             retrain: Whether to retrain the model
+            startup: 'eager' loads everything before returning, 'background'
+                loads NLTK data, spaCy and the classifier on parallel threads,
+                'lazy' loads each component on first use
+            preprocess_cache_size: Memoize this many preprocessed texts,
+                0 disables memoization
+            result_cache_size: Cache intent, confidence and entities for this
+                many normalized queries, 0 disables the cache
+            engine: 'sklearn' scores queries with the fitted Pipeline,
+                'numpy' with NumpyIntentClassifier so serving never
+                imports scikit-learn
+            ner_workers: Run NER in this many spaCy worker processes,
+                0 runs it in-process
+            ner_timeout: Seconds a query waits for worker NER before it
+                continues without entities
+            ner_gate: Skip NER for queries without any entity-like signal
+                (see ner_gate.NERGate)
+            vectorizer_mode: 'tfidf' trains a TfidfVectorizer pipeline,
+                'hashing' a HashingIntentModel with a bounded feature space;
+                loaded artifacts are served in whichever mode they were
+                trained
+            hashing_features: Width of the hashing space
+            train_workers: Processes used to train a hashed model in shards
+            pattern_cache_path: SQLite file caching preprocessed training
+                patterns across retrains, None to preprocess every time
         """
-        self.model_path = model_path
+        if startup not in ('eager', 'background', 'lazy'):
+            raise ValueError(f"Unknown startup mode: {startup}")
+        if engine not in ('sklearn', 'numpy'):
+            raise ValueError(f"Unknown inference engine: {engine}")
+        if vectorizer_mode not in ('tfidf', 'hashing'):
+            raise ValueError(f"Unknown vectorizer mode: {vectorizer_mode}")
+        
+        if model_path.endswith('.pkl'):
+            self.legacy_model_path = model_path
+            self.model_path = model_path[:-len('.pkl')]
+        else:
+            self.legacy_model_path = model_path + '.pkl'
+            self.model_path = model_path
+        self._serving = EMPTY_SERVING
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self.retrain = retrain
+        self.startup = startup
+        self.engine = engine
+        self.vectorizer_mode = vectorizer_mode
+        self.hashing_features = hashing_features
+        self.train_workers = train_workers
         self.nlp = None
+        self.ner_workers = ner_workers
+        self.ner_timeout = ner_timeout
+        self.entity_service = None
+        self.ner_gate = NERGate() if ner_gate else None
         self.stop_words = None
-        self.model = None
-        self.vectorizer = None
-        self.training_data = {}
-        self.responses = {}
+        self.preprocess_cache_size = preprocess_cache_size
+        self.pattern_cache = PatternCache(pattern_cache_path) if pattern_cache_path else None
+        self._stop_table = frozenset()
+        self._split_contractions = True
+        self._preprocess_cached = None
+        self.result_cache = QueryResultCache(maxsize=result_cache_size)
+        
+        self._loaders = {
+            'nltk': self.init_nltk,
+            'spacy': self.init_spacy,
+            'classifier': self.init_classifier
+        }
+        self._ready = {name: threading.Event() for name in self.COMPONENTS}
+        self._load_locks = {name: threading.Lock() for name in self.COMPONENTS}
+        self._threads = {}
+        
+        if startup == 'eager':
+            for name in self.COMPONENTS:
+                self._load_component(name)
+            print("Chatbot model initialized successfully!")
+        elif startup == 'background':
+            for name in self.COMPONENTS:
+                thread = threading.Thread(target=self._load_component, args=(name,),
+                                          name=f'chatbot-load-{name}', daemon=True)
+                self._threads[name] = thread
+                thread.start()
+    
+    def _load_component(self, name):
+        """Load one component exactly once, whichever thread gets there first"""
+        with self._load_locks[name]:
+            if self._ready[name].is_set():
+                return
+            try:
+                self._loaders[name]()
+            except Exception as e:
+                print(f"Warning: could not load {name}: {e}")
+            finally:
+                self._ready[name].set()
+        
+        if self.startup != 'eager' and self.is_ready():
+            print("Chatbot model initialized successfully!")
+    
+    def _require(self, name, block=True):
+        """
+        Make sure a component is loaded before it is used
         
-        # Initialize NLP components with error handling
-        self.init_nlp()
+        Args:
+            name: Component name
+            block: Wait for the component if it is still loading
+            
+        Returns:
+            True if the component is ready
+        """
+        if self._ready[name].is_set():
+            return True
+        if not block:
+            return False
+        if name in self._threads:
+            self._ready[name].wait()
+        else:
+            self._load_component(name)
+        return True
+    
+    def is_ready(self, name=None):
+        """
+        Readiness signal for health checks
         
-        # Load or train model
-        if not retrain and os.path.exists(model_path):
+        Args:
+            name: Component name, or None for all components
+            
+        Returns:
+            True if the component (or every component) has finished loading
+        """
+        if name is not None:
+            return self._ready[name].is_set()
+        return all(event.is_set() for event in self._ready.values())
+    
+    def wait_until_ready(self, timeout=None, components=None):
+        """
+        Block until components have loaded
+        
+        Args:
+            timeout: Maximum seconds to wait in total, or None to wait forever
+            components: Component names, defaults to all
+            
+        Returns:
+            True if every requested component is ready
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in components or self.COMPONENTS:
+            if name not in self._threads:
+                self._require(name)
+                continue
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._ready[name].wait(remaining):
+                return False
+        return True
+    
+    def init_classifier(self):
+        """Load the trained model, or train and save one"""
+        if not self.retrain and (is_artifact(self.model_path) or os.path.isfile(self.legacy_model_path)):
             self.load_model()
         else:
             self.load_training_data()
             self.train_model()
             self.save_model()
-        
-        print("Chatbot model initialized successfully!")
     
     def init_nlp(self):
         """Initialize NLP components with proper error handling"""
+        self.init_nltk()
+        self.init_spacy()
+    
+    def init_nltk(self):
+        """Initialize NLTK data and stopwords"""
         try:
+            import nltk
+            from nltk.corpus import stopwords
+            
             # Download required NLTK data
             required_nltk_data = ['punkt', 'punkt_tab', 'stopwords', 'wordnet']
             
@@ -66,16 +296,41 @@ class ChatbotModel:
             # Fallback to a simple stopwords list
             self.stop_words = set(['a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
         
-        # Initialize spaCy
+        # The fast preprocessor mirrors whichever tokenizer is usable
+        try:
+            from nltk.tokenize import word_tokenize
+            word_tokenize('test')
+            self._split_contractions = True
+        except Exception:
+            self._split_contractions = False
+        
+        self.reset_preprocess_cache()
+    
+    def reset_preprocess_cache(self):
+        """Rebuild the stopword table and drop memoized preprocessing results"""
+        self._stop_table = frozenset(self.stop_words or ())
+        if self.preprocess_cache_size:
+            self._preprocess_cached = lru_cache(maxsize=self.preprocess_cache_size)(self._preprocess_fast)
+        else:
+            self._preprocess_cached = None
+    
+    def init_spacy(self):
+        """Initialize the NER-only spaCy pipeline, in-process or in worker processes"""
+        if self.ner_workers:
+            self.entity_service = EntityService(workers=self.ner_workers, timeout=self.ner_timeout)
+            if not self.entity_service.warmup():
+                print("Warning: spaCy workers did not start. Queries continue without entities.")
+            return
+        
         try:
-            self.nlp = spacy.load('en_core_web_sm')
+            self.nlp = load_ner_pipeline()
         except:
             print("Downloading spaCy model...")
             try:
                 import subprocess
                 import sys
                 subprocess.check_call([sys.executable, '-m', 'spacy', 'download', 'en_core_web_sm'])
-                self.nlp = spacy.load('en_core_web_sm')
+                self.nlp = load_ner_pipeline()
             except:
                 print("Warning: Could not load spaCy model. Entity recognition disabled.")
                 self.nlp = None
@@ -220,6 +475,10 @@ class ChatbotModel:
         """
         Preprocess text for model training/prediction
         
+        Produces the same tokens as preprocess_text_nltk in a single pass:
+        one precompiled regex, a frozenset stopword lookup and one
+        comprehension.
+        
         Args:
             text: Input text string
             
@@ -229,6 +488,46 @@ class ChatbotModel:
         if not isinstance(text, str):
             text = str(text)
         
+        self._require('nltk')
+        
+        if self._preprocess_cached is not None:
+            return self._preprocess_cached(text)
+        return self._preprocess_fast(text)
+    
+    def _preprocess_fast(self, text):
+        stop_table = self._stop_table
+        
+        if self._split_contractions:
+            tokens = [
+                word
+                for raw in WORD_RE.findall(text.lower())
+                for word in TOKEN_SPLITS.get(raw, (raw,))
+                if len(word) > 2 and word not in stop_table
+            ]
+        else:
+            tokens = [
+                word
+                for word in WORD_RE.findall(text.lower())
+                if len(word) > 2 and word not in stop_table
+            ]
+        
+        return ' '.join(tokens)
+    
+    def preprocess_text_nltk(self, text):
+        """
+        Reference preprocessing through NLTK word_tokenize
+        
+        Args:
+            text: Input text string
+            
+        Returns:
+            Preprocessed text string
+        """
+        if not isinstance(text, str):
+            text = str(text)
+        
+        self._require('nltk')
+        
         # Convert to lowercase
         text = text.lower()
         
@@ -238,6 +537,7 @@ class ChatbotModel:
         
         try:
             # Try using NLTK tokenizer
+            from nltk.tokenize import word_tokenize
             tokens = word_tokenize(text)
         except:
             # Fallback to simple tokenization
@@ -252,17 +552,45 @@ class ChatbotModel:
         
         return ' '.join(tokens)
     
+    def preprocess_config(self):
+        """Everything preprocess_text's output depends on, for cache keys"""
+        self._require('nltk')
+        stop_words = '\n'.join(sorted(self._stop_table))
+        return {
+            'version': PREPROCESS_VERSION,
+            'split_contractions': self._split_contractions,
+            'stop_words': hashlib.sha256(stop_words.encode('utf-8')).hexdigest()
+        }
+    
+    def preprocess_patterns(self, patterns):
+        """
+        Preprocess training patterns, reusing the on-disk pattern cache
+        
+        Args:
+            patterns: List of raw pattern strings
+            
+        Returns:
+            List of preprocessed strings in the same order
+        """
+        if self.pattern_cache is None:
+            return [self.preprocess_text(pattern) for pattern in patterns]
+        
+        misses = self.pattern_cache.misses
+        processed = self.pattern_cache.preprocess([str(pattern) for pattern in patterns],
+                                                  self.preprocess_text, self.preprocess_config())
+        print(f"Preprocessed {self.pattern_cache.misses - misses} of {len(patterns)} patterns "
+              f"(the rest from {self.pattern_cache.path})")
+        return processed
+    
     def prepare_training_data(self):
         """Prepare training data for model"""
-        X = []  # Features
-        y = []  # Labels
+        patterns = []
+        intents = []
         
         for intent, data in self.training_data.items():
             for pattern in data['patterns']:
-                processed_pattern = self.preprocess_text(pattern)
-                if processed_pattern:  # Only add non-empty patterns
-                    X.append(processed_pattern)
-                    y.append(intent)
+                patterns.append(pattern)
+                intents.append(intent)
         
         # Add fallback patterns for unknown intent
         fallback_patterns = [
@@ -274,11 +602,15 @@ class ChatbotModel:
             "help me with something else"
         ]
         
-        for pattern in fallback_patterns:
-            processed = self.preprocess_text(pattern)
-            if processed:
+        patterns += fallback_patterns
+        intents += ["unknown"] * len(fallback_patterns)
+        
+        X = []  # Features
+        y = []  # Labels
+        for processed, intent in zip(self.preprocess_patterns(patterns), intents):
+            if processed:  # Only add non-empty patterns
                 X.append(processed)
-                y.append("unknown")
+                y.append(intent)
         
         print(f"Prepared {len(X)} training samples for {len(set(y))} intents")
         return X, y
@@ -294,17 +626,19 @@ class ChatbotModel:
             print("Error: No training data available!")
             return
         
+        if self.vectorizer_mode == 'hashing':
+            # Bounded memory and no vocabulary cap; see hashing_model.py
+            self.model = HashingIntentModel(n_features=self.hashing_features, ngram_range=(1, 2),
+                                            stop_words='english', alpha=0.1)
+            self.model.fit(X, y, workers=self.train_workers)
+            accuracy = np.mean(self.model.predict(X) == np.array(y))
+            print(f"Model training completed! Training accuracy: {accuracy:.2%}")
+            self.vectorizer = None
+            self.set_classifier()
+            return
+        
         # Create and train the model pipeline
-        self.model = Pipeline([
-            ('tfidf', TfidfVectorizer(
-                max_features=1500,
-                ngram_range=(1, 2),  # Reduced from (1,3) to prevent memory issues
-                stop_words='english',
-                min_df=1,
-                max_df=0.9
-            )),
-            ('classifier', MultinomialNB(alpha=0.1))
-        ])
+        self.model = build_tfidf_pipeline()
         
         # Train the model
         self.model.fit(X, y)
@@ -316,36 +650,169 @@ class ChatbotModel:
         
         # Store the vectorizer for later use
         self.vectorizer = self.model.named_steps['tfidf']
+        self.set_classifier()
+    
+    def set_classifier(self):
+        """Pick the object that scores queries for the configured engine"""
+        if isinstance(self.model, HashingIntentModel):
+            # Always scored with NumPy
+            self.classifier = self.model.to_classifier()
+        elif self.engine == 'numpy':
+            self.classifier = NumpyIntentClassifier.from_pipeline(self.model)
+        else:
+            self.classifier = self.model
+        self.result_cache.clear()
     
     def save_model(self):
-        """Save trained model to file"""
+        """Save trained model as a versioned artifact directory"""
         try:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump({
-                    'model': self.model,
-                    'training_data': self.training_data,
-                    'responses': self.responses,
-                    'vectorizer': self.vectorizer
-                }, f)
-            print(f"Model saved to {self.model_path}")
+            self.artifact_hash = save_artifact(self.model_path, self.model, self.training_data, self.responses,
+                                               self.training_state)
+            print(f"Model saved to {self.model_path} ({self.artifact_hash[:12]})")
         except Exception as e:
             print(f"Error saving model: {e}")
     
-    def load_model(self):
-        """Load trained model from file"""
+    def load_model(self, attempts=3, retry_delay=0.5):
+        """
+        Load trained model from its artifact directory
+        
+        A published artifact is never retrained and overwritten because it
+        could not be read: that would replace the model another process just
+        published. Loads that fail are retried, then the error is raised.
+        
+        Args:
+            attempts: Loads tried before giving up
+            retry_delay: Seconds between attempts
+        """
+        if not is_artifact(self.model_path) and os.path.isfile(self.legacy_model_path):
+            self.migrate_legacy_model()
+            return
+        
+        for attempt in range(attempts):
+            try:
+                self.apply_artifact(load_artifact(self.model_path))
+                break
+            except (ArtifactError, OSError, ValueError) as e:
+                if attempt == attempts - 1:
+                    raise
+                print(f"Error loading model: {e}. Retrying...")
+                time.sleep(retry_delay)
+        print(f"Model loaded from {self.model_path} ({self.artifact_hash[:12]})")
+    
+    def build_serving(self, artifact, version=None):
+        """
+        Build the scoring objects for a loaded artifact without using them yet
+        
+        Args:
+            artifact: Result of load_artifact
+            version: Registry version name, if the artifact came from one
+            
+        Returns:
+            ServingModel
+        """
+        if is_hashing(artifact):
+            model = HashingIntentModel.from_artifact(artifact)
+            vectorizer = None
+            classifier = model.classifier
+        elif self.engine == 'numpy':
+            # Serving path without scikit-learn
+            model = vectorizer = None
+            classifier = NumpyIntentClassifier.from_artifact(artifact)
+        else:
+            model = build_pipeline(artifact)
+            vectorizer = model.named_steps['tfidf']
+            classifier = model
+        
+        return ServingModel(
+            classifier=classifier,
+            model=model,
+            vectorizer=vectorizer,
+            training_data=artifact['training_data'],
+            responses=artifact['responses'],
+            training_state=artifact.get('training_state', {}),
+            artifact_hash=artifact['content_hash'],
+            version=version
+        )
+    
+    def swap_serving(self, serving):
+        """
+        Make a ServingModel the one queries use
+        
+        A single reference assignment: process_queries reads the reference
+        once per batch, so queries in flight finish on the model they
+        started with and new ones use the new model. The result cache is
+        cleared after the assignment, which also drops results the old
+        model is still about to cache.
+        
+        Returns:
+            The ServingModel that was replaced
+        """
+        previous, self._serving = self._serving, serving
+        self.result_cache.clear()
+        return previous
+    
+    def apply_artifact(self, artifact, version=None):
+        """Build and swap in a loaded artifact"""
+        self.swap_serving(self.build_serving(artifact, version))
+    
+    def reload_model(self):
+        """
+        Load the artifact at model_path if it differs from the one in use
+        
+        Returns:
+            True if a new artifact was swapped in
+        """
+        content_hash = read_content_hash(self.model_path)
+        if content_hash is None or content_hash == self.artifact_hash:
+            return False
+        
         try:
-            with open(self.model_path, 'rb') as f:
-                data = pickle.load(f)
-                self.model = data['model']
-                self.training_data = data['training_data']
-                self.responses = data['responses']
-                self.vectorizer = data['vectorizer']
-            print(f"Model loaded from {self.model_path}")
+            self.apply_artifact(load_artifact(self.model_path))
         except Exception as e:
-            print(f"Error loading model: {e}. Retraining...")
-            self.load_training_data()
-            self.train_model()
-            self.save_model()
+            # Keep serving the current model; the next check retries
+            print(f"Error reloading model: {e}")
+            return False
+        
+        print(f"Model reloaded from {self.model_path} ({self.artifact_hash[:12]})")
+        return True
+    
+    def start_model_watcher(self, interval=30.0):
+        """
+        Check for a newly published artifact on a background thread
+        
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watcher is not None:
+            return
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(target=self._watch_model, args=(interval,),
+                                         name='chatbot-model-watcher', daemon=True)
+        self._watcher.start()
+    
+    def stop_model_watcher(self):
+        if self._watcher is None:
+            return
+        self._watcher_stop.set()
+        self._watcher.join()
+        self._watcher = None
+    
+    def _watch_model(self, interval):
+        self._require('classifier')
+        while not self._watcher_stop.wait(interval):
+            self.reload_model()
+    
+    def migrate_legacy_model(self):
+        """Convert a trusted legacy pickle into the artifact format"""
+        print(f"Migrating {self.legacy_model_path} to {self.model_path}")
+        with open(self.legacy_model_path, 'rb') as f:
+            data = pickle.load(f)
+        self.model = data['model']
+        self.training_data = data['training_data']
+        self.responses = data['responses']
+        self.vectorizer = self.model.named_steps['tfidf']
+        self.set_classifier()
+        self.save_model()
     
     def extract_entities(self, text):
         """
@@ -357,23 +824,62 @@ class ChatbotModel:
         Returns:
             List of entities
         """
-        entities = []
+        return self.extract_entities_batch([text])[0]
+    
+    def extract_entities_batch(self, texts, batch_size=64):
+        """
+        Extract named entities from many texts with nlp.pipe
         
-        if self.nlp and text:
+        Args:
+            texts: List of input texts
+            batch_size: Number of texts spaCy processes per batch
+            
+        Returns:
+            List of entity lists, one per text
+        """
+        return [entities or [] for entities in self._extract_entities_batch(texts, batch_size)]
+    
+    def _extract_entities_batch(self, texts, batch_size):
+        """
+        Entities per text, or None where NER was unavailable, failed or
+        timed out, so callers can tell "no entities" from "not computed"
+        """
+        results = [[] for _ in texts]
+        if self.ner_gate is not None:
+            indices = [i for i, run in enumerate(self.ner_gate.filter(texts)) if run]
+        else:
+            indices = [i for i, text in enumerate(texts) if text]
+        if not indices:
+            return results
+        
+        # In background mode, skip NER until spaCy has finished loading
+        if not self._require('spacy', block=self.startup != 'background'):
+            for i in indices:
+                results[i] = None
+            return results
+        
+        selected = [texts[i] for i in indices]
+        if self.entity_service is not None:
+            extracted = self.entity_service.extract_batch(selected)
+        elif self.nlp:
             try:
-                doc = self.nlp(text)
-                
-                for ent in doc.ents:
-                    entities.append({
-                        'text': ent.text,
-                        'label': ent.label_,
-                        'start': ent.start_char,
-                        'end': ent.end_char
-                    })
+                extracted = [doc_entities(doc) for doc in self.nlp.pipe(selected, batch_size=batch_size)]
             except Exception as e:
                 print(f"Error extracting entities: {e}")
+                extracted = [None] * len(indices)
+        else:
+            return results
         
-        return entities
+        for i, entities in zip(indices, extracted):
+            results[i] = entities
+        return results
+    
+    def get_ner_stats(self):
+        """Get NER gate and entity worker counters"""
+        return {
+            'gate': self.ner_gate.get_stats() if self.ner_gate is not None else None,
+            'workers': self.entity_service.get_stats() if self.entity_service is not None else None
+        }
     
     def process_query(self, query):
         """
@@ -385,35 +891,109 @@ class ChatbotModel:
         Returns:
             (intent, confidence, response, entities)
         """
-        if not query or not isinstance(query, str) or query.strip() == '':
-            return 'unknown', 0.0, "Please enter a valid query.", []
+        return self.process_queries([query])[0]
+    
+    def process_queries(self, queries, batch_size=64):
+        """
+        Process many user queries in one batch
         
-        # Preprocess query
-        processed_query = self.preprocess_text(query)
+        Queries are vectorized once into a single sparse matrix, the intent is
+        the argmax of one predict_proba call and NER runs through nlp.pipe
+        (in-process or in the entity worker pool).
+        The output matches calling process_query on each query in order.
         
-        if not processed_query or len(processed_query.split()) == 0:
-            return 'unknown', 0.0, "I didn't understand that. Could you please rephrase?", []
+        Args:
+            queries: List of user input texts
+            batch_size: Number of texts spaCy processes per batch
+            
+        Returns:
+            List of (intent, confidence, response, entities)
+        """
+        results = [None] * len(queries)
+        valid = []
         
-        # Extract entities
-        entities = self.extract_entities(query)
+        for i, query in enumerate(queries):
+            if not query or not isinstance(query, str) or query.strip() == '':
+                results[i] = ('unknown', 0.0, "Please enter a valid query.", [])
+            else:
+                valid.append(i)
         
-        # Predict intent using model
-        try:
-            if self.model is None:
-                raise ValueError("Model not initialized")
+        if not valid:
+            return results
+        
+        self._require('classifier')
+        
+        # Preprocess queries
+        processed = {}
+        for i in valid:
+            processed_query = self.preprocess_text(queries[i])
+            if not processed_query or len(processed_query.split()) == 0:
+                results[i] = ('unknown', 0.0, "I didn't understand that. Could you please rephrase?", [])
+            else:
+                processed[i] = processed_query
+        
+        if not processed:
+            return results
+        
+        # Reuse cached classifications; NER is reused only for the exact same text
+        classified = {}
+        entities = {}
+        for i, processed_query in processed.items():
+            cached = self.result_cache.get(processed_query)
+            if cached is not None:
+                intent, confidence, raw_query, cached_entities = cached
+                classified[i] = (intent, confidence)
+                if raw_query == queries[i] and cached_entities is not None:
+                    entities[i] = list(cached_entities)
+        
+        batch = [i for i in processed if i not in classified]
+        ner_batch = [i for i in processed if i not in entities]
+        
+        # Extract entities; results that were not computed are not cached
+        ner_complete = set(entities)
+        if ner_batch:
+            extracted = self._extract_entities_batch([queries[i] for i in ner_batch], batch_size)
+            for i, found in zip(ner_batch, extracted):
+                entities[i] = found or []
+                if found is not None:
+                    ner_complete.add(i)
+        
+        # Predict intents using model
+        if batch:
+            try:
+                # Read before the model: a swap after this clears the cache,
+                # which makes the puts below stale and drops them
+                generation = self.result_cache.generation
+                # One read, so a model swap mid-batch cannot mix two models
+                serving = self._serving
+                classifier = serving.classifier
+                if classifier is None:
+                    raise ValueError("Model not initialized")
                 
-            intent = self.model.predict([processed_query])[0]
-            confidence = max(self.model.predict_proba([processed_query])[0])
-            
-        except Exception as e:
-            print(f"Prediction error: {e}")
-            intent = 'unknown'
-            confidence = 0.0
+                probabilities = classifier.predict_proba([processed[i] for i in batch])
+                best = probabilities.argmax(axis=1)
+                intents = classifier.classes_[best]
+                confidences = probabilities[np.arange(len(batch)), best]
+                
+                for position, i in enumerate(batch):
+                    classified[i] = (intents[position], confidences[position])
+                    self.result_cache.put(processed[i], (
+                        intents[position], confidences[position], queries[i],
+                        list(entities[i]) if i in ner_complete else None
+                    ), generation)
+                
+            except Exception as e:
+                print(f"Prediction error: {e}")
+                for i in batch:
+                    classified[i] = ('unknown', 0.0)
         
-        # Generate response
-        response = self.generate_response(intent, entities, query)
+        # Generate responses after the lookup so they stay randomized
+        for i in processed:
+            intent, confidence = classified[i]
+            response = self.generate_response(intent, entities[i], queries[i])
+            results[i] = (intent, confidence, response, entities[i])
         
-        return intent, confidence, response, entities
+        return results
     
     def generate_response(self, intent, entities, original_query):
         """
@@ -450,6 +1030,8 @@ class ChatbotModel:
         """
         suggestions = []
         
+        self._require('classifier')
+        
         if intent and intent in self.training_data:
             # Get patterns for specific intent
             patterns = self.training_data[intent]['patterns']
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Accuracy comparison of the TF-IDF and hashing vectorizer modes
+
+Splits the preprocessed training corpus into stratified folds, trains the
+current TfidfVectorizer pipeline and HashingIntentModel at one or more
+hashing widths on each training split, and reports held-out accuracy, how
+often the two modes agree, array memory and per-query scoring latency.
+Extra corpora in data/training_data.json's layout can be merged in to see
+how the modes behave as the vocabulary grows.
+
+    python compare_vectorizers.py --corpus faq_admissions.json --features 16 18
+    python compare_vectorizers.py --max-accuracy-drop 0.01
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from chatbot_model import ChatbotModel, build_tfidf_pipeline
+from hashing_model import HashingIntentModel
+from inference_engine import NumpyIntentClassifier
+
+
+def stratified_folds(labels, folds):
+    """Fold number of each sample, dealing every intent's samples round-robin"""
+    seen = {}
+    assignment = []
+    for label in labels:
+        assignment.append(seen.get(label, 0) % folds)
+        seen[label] = seen.get(label, 0) + 1
+    return np.array(assignment)
+
+
+def array_bytes(engine):
+    """Bytes held by an engine's arrays and, for TF-IDF, its vocabulary dict"""
+    total = engine.idf.nbytes + np.asarray(engine.feature_log_prob).nbytes + engine.class_log_prior.nbytes
+    if engine.columns is not None:
+        total += engine.columns.nbytes
+    if engine.vocabulary is not None:
+        total += sys.getsizeof(engine.vocabulary) + sum(sys.getsizeof(term) for term in engine.vocabulary)
+    return total
+
+
+def latency_us(engine, texts, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            engine.predict_proba([text])
+        best = min(best, time.perf_counter() - started)
+    return best / max(len(texts), 1) * 1e6
+
+
+def compare(X, y, feature_widths, folds=5, workers=1):
+    """
+    Cross-validate both modes
+
+    Returns:
+        Dictionary of per-mode results keyed by mode name
+    """
+    X = np.array(X, dtype=object)
+    y = np.array(y)
+    assignment = stratified_folds(y, folds)
+
+    modes = ['tfidf'] + [f'hashing 2^{bits}' for bits in feature_widths]
+    results = {mode: {'correct': 0, 'agree': 0, 'train_seconds': 0.0, 'bytes': 0, 'latency_us': 0.0}
+               for mode in modes}
+    tested = 0
+
+    for fold in range(folds):
+        train, test = assignment != fold, assignment == fold
+        if not test.any() or len(set(y[train])) < 2:
+            continue
+        test_texts = X[test].tolist()
+        tested += len(test_texts)
+
+        started = time.perf_counter()
+        pipeline = build_tfidf_pipeline().fit(X[train].tolist(), y[train].tolist())
+        engines = {'tfidf': (NumpyIntentClassifier.from_pipeline(pipeline), time.perf_counter() - started)}
+
+        for bits in feature_widths:
+            started = time.perf_counter()
+            model = HashingIntentModel(n_features=2 ** bits).fit(X[train].tolist(), y[train].tolist(), workers)
+            engines[f'hashing 2^{bits}'] = (model.classifier, time.perf_counter() - started)
+
+        baseline = engines['tfidf'][0].predict(test_texts)
+        for mode, (engine, seconds) in engines.items():
+            predicted = engine.predict(test_texts)
+            result = results[mode]
+            result['correct'] += int(np.sum(predicted == y[test]))
+            result['agree'] += int(np.sum(predicted == baseline))
+            result['train_seconds'] += seconds
+            result['bytes'] = max(result['bytes'], array_bytes(engine))
+            result['latency_us'] += latency_us(engine, test_texts[:100]) / folds
+
+    for result in results.values():
+        result['accuracy'] = result['correct'] / tested if tested else 0.0
+        result['agreement'] = result['agree'] / tested if tested else 0.0
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', action='append', default=[],
+                        help='extra training data JSON to merge in (repeatable)')
+    parser.add_argument('--features', type=int, nargs='+', default=[14, 16, 18],
+                        help='hashing widths to try, as powers of two')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1, help='processes per hashed training run')
+    parser.add_argument('--max-accuracy-drop', type=float,
+                        help='exit non-zero if the widest hashing mode trails TF-IDF by more than this')
+    args = parser.parse_args()
+
+    model = ChatbotModel(startup='lazy')
+    model.wait_until_ready(components=['nltk'])
+    model.load_training_data()
+    training_data = dict(model.training_data)
+    for path in args.corpus:
+        with open(path, 'r', encoding='utf-8') as f:
+            for intent, data in json.load(f).items():
+                merged = training_data.setdefault(intent, {'patterns': []})
+                training_data[intent] = dict(merged, patterns=list(merged['patterns']) + list(data['patterns']))
+    model.training_data = training_data
+
+    X, y = model.prepare_training_data()
+    results = compare(X, y, args.features, args.folds, args.workers)
+
+    print("=" * 72)
+    print("VECTORIZER COMPARISON")
+    print("=" * 72)
+    print(f"{len(X)} samples, {len(set(y))} intents, {args.folds} stratified folds\n")
+    print(f"{'Mode':<16}{'Accuracy':>10}{'Agree':>9}{'Train s':>10}{'Memory KB':>12}{'Query µs':>11}")
+    print("-" * 68)
+    for mode, result in results.items():
+        print(f"{mode:<16}{result['accuracy']:>10.2%}{result['agreement']:>9.2%}{result['train_seconds']:>10.2f}"
+              f"{result['bytes'] / 1024:>12.0f}{result['latency_us']:>11.1f}")
+
+    if args.max_accuracy_drop is not None:
+        widest = results[f'hashing 2^{max(args.features)}']
+        drop = results['tfidf']['accuracy'] - widest['accuracy']
+        if drop > args.max_accuracy_drop:
+            print(f"\n✗ Hashing accuracy trails TF-IDF by {drop:.2%}")
+            sys.exit(1)
@@ -0,0 +1,205 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+
+class _FlushMarker:
+    """Queued behind pending rows; set once every row ahead of it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class ConversationLogger:
+    """
+    Write-behind logger for conversation rows.
+
+    Rows are put on a bounded in-memory queue and a background thread writes
+    them with executemany, one transaction per batch, so request threads never
+    wait on a commit. When the queue is full, callers block for up to
+    put_timeout seconds before the row is dropped.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path, insert_sql, flush_size=100, flush_interval=0.5,
+                 max_queue_size=10000, put_timeout=1.0, connect=None):
+        """
+        Start the background writer
+
+        Args:
+            db_path: SQLite database file
+            insert_sql: Parameterised INSERT statement for one row
+            flush_size: Maximum rows written per transaction
+            flush_interval: Maximum seconds a row waits before being written
+            max_queue_size: Rows buffered before callers are held back
+            put_timeout: Seconds a caller may block on a full queue
+            connect: Optional factory for the writer's connection
+        """
+        self.db_path = db_path
+        self.insert_sql = insert_sql
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.connect = connect
+
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name='conversation-logger', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, row):
+        """
+        Queue a row for writing
+
+        Args:
+            row: Tuple of values matching insert_sql
+
+        Returns:
+            True if the row was queued, False if it was dropped
+        """
+        if self._closed:
+            return False
+
+        try:
+            self.queue.put(row, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"Warning: conversation log queue full, dropped row ({self.dropped} total)")
+            return False
+
+    def flush(self, timeout=5.0):
+        """
+        Wait until every row queued so far has been written
+
+        Rows logged after the call are not waited for, so steady traffic
+        cannot keep a flush waiting.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the rows were written, False on timeout or if the writer
+            is not running
+        """
+        if not self._thread.is_alive():
+            return False
+
+        deadline = time.monotonic() + timeout
+        marker = _FlushMarker()
+        try:
+            self.queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(max(0.0, deadline - time.monotonic()))
+
+    def close(self):
+        """Drain the queue and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def get_stats(self):
+        """Get writer counters"""
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches
+        }
+
+    def _collect_batch(self):
+        """
+        Wait for a first row, then gather more until the batch is full or the interval passes
+
+        A flush marker ends the batch early so the flush is not held up.
+
+        Returns:
+            (rows, flush markers, stopping)
+        """
+        first = self.queue.get()
+        if first is self._STOP:
+            return [], [], True
+        if isinstance(first, _FlushMarker):
+            return [], [first], False
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is self._STOP:
+                return batch, [], True
+            if isinstance(row, _FlushMarker):
+                return batch, [row], False
+            batch.append(row)
+
+        return batch, [], False
+
+    def _release(self, markers):
+        for marker in markers:
+            marker.done.set()
+            self.queue.task_done()
+
+    def _write_batch(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(self.insert_sql, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            print(f"Error writing conversation batch: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def _run(self):
+        if self.connect:
+            conn = self.connect()
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            stopping = False
+            while not stopping:
+                batch, markers, stopping = self._collect_batch()
+                if batch:
+                    self._write_batch(conn, batch)
+                self._release(markers)
+
+            # Anything queued after the stop marker is still written
+            remaining = []
+            markers = []
+            while True:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(entry, _FlushMarker):
+                    markers.append(entry)
+                elif entry is not self._STOP:
+                    remaining.append(entry)
+                else:
+                    self.queue.task_done()
+            if remaining:
+                self._write_batch(conn, remaining)
+            self._release(markers)
+        finally:
+            # Account for the stop marker
+            self.queue.task_done()
+            conn.close()
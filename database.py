@@ -1,16 +1,184 @@
 import sqlite3
 from datetime import datetime
+import base64
+import binascii
 import json
 import os
+import threading
+import time
+import weakref
+from itertools import islice
+
+from export_stream import EXPORT_FORMATS, conversation_filters, export_chunks
+
+def encode_cursor(timestamp, row_id):
+    """
+    Opaque pagination token for the position after a row
+    
+    Args:
+        timestamp: The row's timestamp value
+        row_id: The row's id
+        
+    Returns:
+        URL-safe string
+    """
+    payload = json.dumps([timestamp, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Read a token made by encode_cursor
+    
+    Returns:
+        (timestamp, row_id)
+        
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if not isinstance(timestamp, str) or not isinstance(row_id, int):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return timestamp, row_id
+
+def keyset_page(conn, sql, where, params, limit, cursor=None, alias=''):
+    """
+    Run one page of a newest-first keyset query
+    
+    Rows are ordered by (timestamp, id) descending and the page starts
+    strictly after the cursor position, so the cost does not depend on how
+    deep the page is.
+    
+    Args:
+        conn: SQLite connection
+        sql: SELECT ... FROM ... without WHERE or ORDER BY
+        where: List of WHERE conditions
+        params: Parameters for the conditions
+        limit: Maximum rows in the page
+        cursor: Token from a previous page, or None for the first page
+        alias: Table alias prefix for the timestamp and id columns, e.g. 'c.'
+        
+    Returns:
+        (list of row dictionaries, next cursor or None on the last page)
+    """
+    where = list(where)
+    params = list(params)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        # The first condition is the index range, the second breaks timestamp ties
+        where.append(f'{alias}timestamp <= ? AND ({alias}timestamp < ? OR {alias}id < ?)')
+        params.extend([timestamp, timestamp, row_id])
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {alias}timestamp DESC, {alias}id DESC LIMIT ?'
+    params.append(limit + 1)
+    
+    cursor_obj = conn.execute(sql, params)
+    columns = [column[0] for column in cursor_obj.description]
+    rows = [dict(zip(columns, row)) for row in cursor_obj.fetchall()]
+    
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]['timestamp'], rows[-1]['id'])
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+class _ThreadConnection:
+    """Holds one thread's connection and closes it when the thread's locals go away"""
+    
+    __slots__ = ('conn', 'close', '__weakref__')
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.close = weakref.finalize(self, _close_quietly, conn)
+
+class ConnectionPool:
+    """
+    Per-thread SQLite connections, configured once when first opened.
+    
+    Connections run in WAL journal mode so readers no longer block the
+    writer, with synchronous=NORMAL, a larger page cache and a busy timeout.
+    A thread's connection is closed when the thread exits, so short-lived
+    request threads do not accumulate open connections.
+    """
+    
+    def __init__(self, db_path, cache_size_kb=8192, busy_timeout_ms=5000):
+        """
+        Create a pool for one database file
+        
+        Args:
+            db_path: SQLite database file
+            cache_size_kb: Page cache size per connection in KiB
+            busy_timeout_ms: How long a connection waits on a locked database
+        """
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._holders = weakref.WeakSet()
+        self._lock = threading.Lock()
+    
+    def new_connection(self):
+        """Open a configured connection that is not owned by the pool"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    def connect(self):
+        """
+        Get the calling thread's connection
+        
+        Use it as `with pool.connect() as conn:` to commit on success and
+        roll back on error. The connection stays open for reuse.
+        """
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = _ThreadConnection(self.new_connection())
+            self._local.holder = holder
+            with self._lock:
+                self._holders.add(holder)
+        return holder.conn
+    
+    @property
+    def open_connections(self):
+        """Number of live per-thread connections"""
+        with self._lock:
+            return len(self._holders)
+    
+    def close_all(self):
+        """Close every connection the pool still holds"""
+        with self._lock:
+            holders = list(self._holders)
+            self._holders = weakref.WeakSet()
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+
+# Keeps IN (...) lists below SQLite's bound-parameter limit
+MAX_QUERY_PARAMS = 500
 
 class DatabaseManager:
     def __init__(self, db_path='chatbot.db'):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
         self.init_database()
     
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             # Create tables
@@ -80,14 +248,35 @@ class DatabaseManager:
             # Create indexes for better performance
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_intent ON conversations(intent_detected)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_user_timestamp ON conversations(user_id, timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_session_timestamp ON conversations(session_id, timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_feedback_rating ON feedback(rating)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_feedback_conversation ON feedback(conversation_id)')
+            
+            # Knowledge version, bumped by every change to intents or responses
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS knowledge_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO knowledge_version (id, version) VALUES (1, 0)')
+            for table in ('intents', 'responses'):
+                for event in ('INSERT', 'UPDATE', 'DELETE'):
+                    cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE knowledge_version SET version = version + 1 WHERE id = 1;
+                    END
+                    ''')
             
             conn.commit()
             print("Database tables initialized successfully!")
     
     def add_intent(self, name, description=None, examples=None):
         """Add a new intent to the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             examples_json = json.dumps(examples) if examples else None
             
@@ -109,7 +298,7 @@ class DatabaseManager:
     
     def add_response(self, intent_name, response_text, response_type='text', metadata=None):
         """Add a response for an intent"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             # Get intent_id
@@ -135,7 +324,7 @@ class DatabaseManager:
     def log_conversation(self, user_id, session_id, query, response, 
                          intent_detected, confidence, entities=None):
         """Log a conversation to the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             entities_json = json.dumps(entities) if entities else None
@@ -151,7 +340,7 @@ class DatabaseManager:
     
     def add_feedback(self, conversation_id, user_id, rating, comments=None):
         """Add feedback for a conversation"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -162,9 +351,188 @@ class DatabaseManager:
             conn.commit()
             return cursor.lastrowid
     
+    def bulk_add_intents(self, intents):
+        """
+        Add many intents in one transaction
+        
+        Existing intents are left unchanged, as with add_intent.
+        
+        Args:
+            intents: Iterable of (name, description, examples) tuples
+            
+        Returns:
+            Report dictionary with row counts and throughput
+        """
+        started = time.perf_counter()
+        intents = list(intents)
+        
+        with self.pool.connect() as conn:
+            inserted = self._insert_intents(conn, intents)
+        
+        return self._bulk_report('intents', len(intents), inserted, started)
+    
+    def bulk_add_responses(self, responses):
+        """
+        Add many responses in one transaction
+        
+        Intent names are resolved together; unknown intents are created
+        first, as add_response does.
+        
+        Args:
+            responses: Iterable of (intent_name, response_text) or
+                (intent_name, response_text, response_type, metadata) tuples
+            
+        Returns:
+            Report dictionary with row counts and throughput
+        """
+        started = time.perf_counter()
+        responses = list(responses)
+        
+        with self.pool.connect() as conn:
+            inserted, created = self._insert_responses(conn, responses)
+        
+        report = self._bulk_report('responses', len(responses), inserted, started)
+        report['intents_created'] = created
+        return report
+    
+    def seed_knowledge(self, intents, responses):
+        """
+        Add intents and their responses unless any of the intents exist
+        
+        The check and both inserts run in one write transaction, so when
+        several processes seed the same database at once exactly one of
+        them imports and the others see its rows.
+        
+        Args:
+            intents: (name, description, examples) tuples, as for bulk_add_intents
+            responses: Response tuples, as for bulk_add_responses
+            
+        Returns:
+            True if the rows were added
+        """
+        intents = list(intents)
+        names = [intent[0] for intent in intents]
+        
+        with self.pool.connect() as conn:
+            # Takes the write lock before reading, so no other seeder can interleave
+            conn.execute('BEGIN IMMEDIATE')
+            if self._resolve_intents(conn, names):
+                return False
+            self._insert_intents(conn, intents)
+            self._insert_responses(conn, list(responses))
+        return True
+    
+    @staticmethod
+    def _insert_intents(conn, intents):
+        """Insert intents that do not exist yet; returns the rows inserted"""
+        rows = [
+            (name, description, json.dumps(examples) if examples else None)
+            for name, description, examples in intents
+        ]
+        # rowcount leaves out rows changed by triggers
+        return conn.executemany('''
+            INSERT OR IGNORE INTO intents (name, description, examples)
+            VALUES (?, ?, ?)
+        ''', rows).rowcount
+    
+    def _insert_responses(self, conn, responses):
+        """Insert responses, creating unknown intents; returns (rows inserted, intents created)"""
+        responses = [
+            (response[0], response[1],
+             response[2] if len(response) > 2 else 'text',
+             response[3] if len(response) > 3 else None)
+            for response in responses
+        ]
+        names = sorted({response[0] for response in responses})
+        intent_ids = self._resolve_intents(conn, names)
+        missing = [name for name in names if name not in intent_ids]
+        if missing:
+            conn.executemany('INSERT OR IGNORE INTO intents (name) VALUES (?)', [(name,) for name in missing])
+            intent_ids.update(self._resolve_intents(conn, missing))
+        
+        # rowcount leaves out rows changed by triggers
+        inserted = conn.executemany('''
+            INSERT INTO responses (intent_id, response_text, response_type, metadata)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (intent_ids[name], text, response_type, json.dumps(metadata) if metadata else None)
+            for name, text, response_type, metadata in responses
+        ]).rowcount
+        return inserted, len(missing)
+    
+    def bulk_log_conversations(self, conversations, batch_size=5000):
+        """
+        Log many conversations in one transaction
+        
+        The input is consumed in batches, so a generator over a large log
+        file is never held in memory at once.
+        
+        Args:
+            conversations: Iterable of (user_id, session_id, query, response,
+                intent_detected, confidence) tuples, optionally followed by
+                entities and a timestamp
+            batch_size: Rows per executemany call
+            
+        Returns:
+            Report dictionary with row counts and throughput
+        """
+        started = time.perf_counter()
+        total = 0
+        iterator = iter(conversations)
+        
+        with self.pool.connect() as conn:
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                conn.executemany('''
+                    INSERT INTO conversations
+                    (user_id, session_id, query, response, intent_detected, confidence, entities, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                ''', [
+                    (*conversation[:6],
+                     json.dumps(conversation[6]) if len(conversation) > 6 and conversation[6] else None,
+                     conversation[7] if len(conversation) > 7 else None)
+                    for conversation in batch
+                ])
+                total += len(batch)
+        
+        return self._bulk_report('conversations', total, total, started)
+    
+    @staticmethod
+    def _resolve_intents(conn, names):
+        """Map intent names to ids with one query per MAX_QUERY_PARAMS names"""
+        intent_ids = {}
+        for start in range(0, len(names), MAX_QUERY_PARAMS):
+            chunk = names[start:start + MAX_QUERY_PARAMS]
+            placeholders = ', '.join('?' * len(chunk))
+            intent_ids.update(
+                (name, intent_id) for intent_id, name in
+                conn.execute(f'SELECT id, name FROM intents WHERE name IN ({placeholders})', chunk)
+            )
+        return intent_ids
+    
+    @staticmethod
+    def _bulk_report(table, rows, inserted, started):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"Bulk {table}: {inserted}/{rows} rows inserted in {elapsed * 1000:.1f} ms ({rate:,.0f} rows/s)")
+        return {
+            'table': table,
+            'rows': rows,
+            'inserted': inserted,
+            'seconds': elapsed,
+            'rows_per_second': rate
+        }
+    
     def get_conversation_history(self, user_id=None, limit=50, offset=0):
-        """Get conversation history"""
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Get conversation history
+        
+        OFFSET pages get slower the deeper they are; prefer
+        get_conversation_page for paging through history.
+        """
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             if user_id:
@@ -173,7 +541,7 @@ class DatabaseManager:
                     FROM conversations c
                     LEFT JOIN users u ON c.user_id = u.id
                     WHERE c.user_id = ?
-                    ORDER BY c.timestamp DESC
+                    ORDER BY c.timestamp DESC, c.id DESC
                     LIMIT ? OFFSET ?
                 ''', (user_id, limit, offset))
             else:
@@ -181,28 +549,62 @@ class DatabaseManager:
                     SELECT c.*, u.name, u.student_id
                     FROM conversations c
                     LEFT JOIN users u ON c.user_id = u.id
-                    ORDER BY c.timestamp DESC
+                    ORDER BY c.timestamp DESC, c.id DESC
                     LIMIT ? OFFSET ?
                 ''', (limit, offset))
             
             columns = [column[0] for column in cursor.description]
-            results = []
-            
-            for row in cursor.fetchall():
-                result = dict(zip(columns, row))
-                # Parse JSON fields
-                if result.get('entities'):
-                    try:
-                        result['entities'] = json.loads(result['entities'])
-                    except:
-                        result['entities'] = []
-                results.append(result)
-            
-            return results
+            return [self._parse_conversation(dict(zip(columns, row))) for row in cursor.fetchall()]
+    
+    def get_conversation_page(self, user_id=None, session_id=None, limit=50, cursor=None):
+        """
+        Get one page of conversation history, newest first
+        
+        Args:
+            user_id: Only conversations of this user
+            session_id: Only conversations of this session
+            limit: Maximum conversations in the page
+            cursor: next_cursor of the previous page, None for the first page
+            
+        Returns:
+            Dictionary with 'conversations' and 'next_cursor' (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        where, params = [], []
+        if user_id:
+            where.append('c.user_id = ?')
+            params.append(user_id)
+        if session_id:
+            where.append('c.session_id = ?')
+            params.append(session_id)
+        
+        with self.pool.connect() as conn:
+            rows, next_cursor = keyset_page(conn, '''
+                SELECT c.*, u.name, u.student_id
+                FROM conversations c
+                LEFT JOIN users u ON c.user_id = u.id
+            ''', where, params, limit, cursor, alias='c.')
+        
+        return {
+            'conversations': [self._parse_conversation(row) for row in rows],
+            'next_cursor': next_cursor
+        }
+    
+    @staticmethod
+    def _parse_conversation(result):
+        # Parse JSON fields
+        if result.get('entities'):
+            try:
+                result['entities'] = json.loads(result['entities'])
+            except:
+                result['entities'] = []
+        return result
     
     def get_statistics(self):
         """Get system statistics"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             stats = {}
@@ -253,7 +655,7 @@ class DatabaseManager:
     
     def get_intent_responses(self, intent_name):
         """Get all responses for an intent"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -274,9 +676,53 @@ class DatabaseManager:
             
             return responses
     
+    def get_knowledge_version(self):
+        """Get the counter bumped by every change to intents or responses"""
+        with self.pool.connect() as conn:
+            row = conn.execute('SELECT version FROM knowledge_version WHERE id = 1').fetchone()
+            return row[0] if row else 0
+    
+    def load_knowledge(self):
+        """
+        Read every intent with its responses in one consistent read
+        
+        Returns:
+            (version, list of dictionaries with name, description, patterns
+            and responses, in id order)
+        """
+        with self.pool.connect() as conn:
+            # One read transaction, so the version matches the rows
+            conn.execute('BEGIN')
+            try:
+                row = conn.execute('SELECT version FROM knowledge_version WHERE id = 1').fetchone()
+                version = row[0] if row else 0
+                
+                intents = {}
+                for intent_id, name, description, examples in conn.execute(
+                        'SELECT id, name, description, examples FROM intents ORDER BY id'):
+                    try:
+                        patterns = json.loads(examples) if examples else []
+                    except ValueError:
+                        patterns = []
+                    intents[intent_id] = {
+                        'name': name,
+                        'description': description,
+                        'patterns': patterns,
+                        'responses': []
+                    }
+                
+                for intent_id, text in conn.execute(
+                        'SELECT intent_id, response_text FROM responses ORDER BY id'):
+                    if intent_id in intents:
+                        intents[intent_id]['responses'].append(text)
+            finally:
+                conn.commit()
+        
+        return version, list(intents.values())
+    
     def add_user(self, student_id, name=None, email=None, department=None, year=None):
         """Add a new user to the system"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -294,7 +740,7 @@ class DatabaseManager:
     
     def clear_all_data(self):
         """Clear all data from database (for testing/reset)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute('DELETE FROM feedback')
@@ -309,6 +755,51 @@ class DatabaseManager:
             conn.commit()
             print("All data cleared from database!")
     
+    def export_conversations(self, format='ndjson', start=None, end=None, session_id=None,
+                             user_id=None, chunk_size=1000):
+        """
+        Stream conversations, oldest first, as NDJSON or CSV
+        
+        Arguments are checked before the generator is returned, so bad input
+        raises here rather than halfway through a response.
+        
+        Args:
+            format: 'ndjson' or 'csv'
+            start: Inclusive ISO start date or datetime
+            end: ISO end datetime (exclusive) or date (inclusive)
+            session_id: Only this session
+            user_id: Only this user
+            chunk_size: Rows fetched per chunk
+            
+        Returns:
+            Generator of text chunks
+            
+        Raises:
+            ValueError: On an unknown format or malformed date
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        
+        where, params = conversation_filters(start, end, session_id)
+        if user_id:
+            where.append('user_id = ?')
+            params.append(user_id)
+        
+        sql = 'SELECT * FROM conversations'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY timestamp, id'
+        
+        return self._iter_export(sql, params, format, chunk_size, self._parse_conversation)
+    
+    def _iter_export(self, sql, params, format, chunk_size, transform):
+        # A private connection, so a long export never holds the thread's pooled one
+        conn = self.pool.new_connection()
+        try:
+            yield from export_chunks(conn, sql, params, format, chunk_size, transform)
+        finally:
+            conn.close()
+    
     def export_data(self, format='json'):
         """Export database data"""
         data = {
@@ -318,9 +809,9 @@ class DatabaseManager:
             'feedback': []
         }
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             # Export intents
             cursor.execute('SELECT * FROM intents')
@@ -388,8 +879,7 @@ if __name__ == '__main__':
         ('faculty', 'Faculty information', ['faculty details', 'professor contact', 'teacher information', 'department faculty'])
     ]
     
-    for intent in sample_intents:
-        db.add_intent(intent[0], intent[1], intent[2])
+    db.bulk_add_intents(sample_intents)
     
     # Add sample responses
     print("\nAdding sample responses...")
@@ -435,8 +925,7 @@ if __name__ == '__main__':
         ('faculty', 'For academic queries, contact your class coordinator or department head.')
     ]
     
-    for response in sample_responses:
-        db.add_response(response[0], response[1])
+    db.bulk_add_responses(sample_responses)
     
     # Add a sample user
     print("\nAdding sample user...")
@@ -458,8 +947,7 @@ if __name__ == '__main__':
         (user_id, 'session_001', 'library timings', 'Library timings: Monday to Friday - 8 AM to 8 PM.', 'library', 0.94)
     ]
     
-    for conv in sample_conversations:
-        db.log_conversation(*conv)
+    db.bulk_log_conversations(sample_conversations)
     
     # Add sample feedback
     print("\nAdding sample feedback...")
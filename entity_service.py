@@ -0,0 +1,254 @@
+"""
+Named entity extraction in a pool of spaCy worker processes
+
+Running en_core_web_sm inline costs the serving thread the whole pipeline
+while holding the GIL. EntityService keeps one NER-only pipeline per worker
+process, sends texts over in nlp.pipe batches and waits at most `timeout`
+seconds per call; anything slower, or a broken pool, yields no entities
+instead of a late response.
+
+    service = EntityService(workers=2, timeout=0.25)
+    service.warmup()
+    entities = service.extract("Is the exam on 12 March?")
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+DEFAULT_MODEL = 'en_core_web_sm'
+
+# Pipeline of the current worker process, set by _init_worker
+_worker_nlp = None
+
+
+def load_ner_pipeline(model_name=DEFAULT_MODEL):
+    """
+    Load a spaCy pipeline with everything except NER disabled
+
+    Components NER listens to (a shared tok2vec) stay enabled, so the
+    entities are the same as with the full pipeline.
+
+    Args:
+        model_name: Installed spaCy model package
+
+    Returns:
+        spaCy Language object
+    """
+    import spacy
+
+    nlp = spacy.load(model_name)
+    keep = {'ner'}
+    for name, component in nlp.pipeline:
+        if 'ner' in getattr(component, 'listening_components', ()):
+            keep.add(name)
+    for name in nlp.pipe_names:
+        if name not in keep:
+            nlp.disable_pipe(name)
+    return nlp
+
+
+def doc_entities(doc):
+    """Entities of a spaCy Doc as plain dictionaries"""
+    return [
+        {
+            'text': ent.text,
+            'label': ent.label_,
+            'start': ent.start_char,
+            'end': ent.end_char
+        }
+        for ent in doc.ents
+    ]
+
+
+def _init_worker(model_name):
+    global _worker_nlp
+    _worker_nlp = load_ner_pipeline(model_name)
+
+
+def _worker_ping():
+    return _worker_nlp is not None
+
+
+def _worker_extract(texts, batch_size):
+    return [doc_entities(doc) for doc in _worker_nlp.pipe(texts, batch_size=batch_size)]
+
+
+class EntityService:
+    """Process pool of NER-only spaCy pipelines with a per-call deadline"""
+
+    def __init__(self, workers=2, model_name=DEFAULT_MODEL, timeout=0.25, batch_size=64,
+                 start_method='spawn'):
+        """
+        Start the worker pool
+
+        Args:
+            workers: Number of spaCy worker processes
+            model_name: spaCy model each worker loads
+            timeout: Seconds a call waits for entities before giving up
+            batch_size: Texts per nlp.pipe batch, and per task sent to a worker
+            start_method: multiprocessing start method; 'spawn' keeps the
+                serving process's threads and sockets out of the workers
+        """
+        self.workers = workers
+        self.model_name = model_name
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.context = multiprocessing.get_context(start_method)
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._closed = False
+
+        self.calls = 0
+        self.texts = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+        self.total_latency = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Entity service is closed")
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self.context,
+                    initializer=_init_worker,
+                    initargs=(self.model_name,)
+                )
+            return self._executor
+
+    def _restart(self, executor):
+        """Replace a broken pool; callers racing on the same pool restart it once"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def warmup(self, timeout=60.0):
+        """
+        Start every worker and wait until its pipeline is loaded
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if all workers are ready
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(_worker_ping) for _ in range(self.workers)]
+        try:
+            return all(future.result(timeout) for future in futures)
+        except FutureTimeoutError:
+            return False
+        except Exception as e:
+            print(f"Error starting entity workers: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._restart(executor)
+            return False
+
+    def extract(self, text):
+        """
+        Extract entities from one text
+
+        Returns:
+            List of entities, empty on timeout or worker failure
+        """
+        return self.extract_batch([text])[0] or []
+
+    def extract_batch(self, texts):
+        """
+        Extract entities from many texts within one deadline
+
+        Texts are split into batch_size chunks spread over the workers.
+
+        Args:
+            texts: List of input texts
+
+        Returns:
+            List with one entity list per text, or None for texts whose
+            chunk timed out or failed
+        """
+        results = [None] * len(texts)
+        indices = [i for i, text in enumerate(texts) if text]
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = []
+        if not indices:
+            return results
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        timeouts = failures = 0
+
+        executor = None
+        try:
+            executor = self._get_executor()
+            chunks = [indices[start:start + self.batch_size] for start in range(0, len(indices), self.batch_size)]
+            futures = [executor.submit(_worker_extract, [texts[i] for i in chunk], self.batch_size)
+                       for chunk in chunks]
+        except BrokenProcessPool as e:
+            # A worker died since the last call; start a fresh pool for the next one
+            print(f"Error extracting entities: {e}")
+            chunks, futures = [], []
+            failures = len(indices)
+            self._restart(executor)
+        except RuntimeError as e:
+            print(f"Error extracting entities: {e}")
+            chunks, futures = [], []
+            failures = len(indices)
+
+        for chunk, future in zip(chunks, futures):
+            try:
+                extracted = future.result(max(0.0, deadline - time.monotonic()))
+                for i, entities in zip(chunk, extracted):
+                    results[i] = entities
+            except FutureTimeoutError:
+                # The worker finishes the chunk on its own; nobody waits for it
+                future.cancel()
+                timeouts += len(chunk)
+            except BrokenProcessPool as e:
+                print(f"Error extracting entities: {e}")
+                failures += len(chunk)
+                self._restart(executor)
+            except Exception as e:
+                print(f"Error extracting entities: {e}")
+                failures += len(chunk)
+
+        with self._stats_lock:
+            self.calls += 1
+            self.texts += len(indices)
+            self.timeouts += timeouts
+            self.failures += failures
+            self.total_latency += time.monotonic() - started
+
+        return results
+
+    def close(self):
+        """Stop the worker processes"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self):
+        """Get call, timeout and failure counts"""
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'timeout': self.timeout,
+                'calls': self.calls,
+                'texts': self.texts,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'restarts': self.restarts,
+                'average_latency': self.total_latency / self.calls if self.calls else 0.0
+            }
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Offline recall check for the NER gate
+
+Runs the NER-only spaCy pipeline on every query in the corpus and compares
+it with the gated path: an entity counts as lost when the gate skipped the
+query it was found in. The corpus is the training patterns, logged
+conversations from the chatbot databases and, optionally, a text file with
+one query per line.
+
+    python evaluate_ner_gate.py --queries logs.txt --min-recall 0.95
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from entity_service import doc_entities, load_ner_pipeline
+from ner_gate import NERGate
+
+DATABASES = ['chatbot_ai.db', 'chatbot.db']
+
+
+def load_corpus(query_file=None, limit=None):
+    """Collect queries from training data, conversation logs and a text file"""
+    corpus = []
+    if os.path.exists('data/training_data.json'):
+        with open('data/training_data.json', 'r', encoding='utf-8') as f:
+            training_data = json.load(f)
+        corpus += [pattern for data in training_data.values() for pattern in data['patterns']]
+
+    for path in DATABASES:
+        if not os.path.exists(path):
+            continue
+        try:
+            conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                sql = 'SELECT query FROM conversations ORDER BY id DESC'
+                if limit:
+                    sql += f' LIMIT {int(limit)}'
+                corpus += [row[0] for row in conn.execute(sql)]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Skipping {path}: {e}")
+
+    if query_file:
+        with open(query_file, 'r', encoding='utf-8') as f:
+            corpus += [line.strip() for line in f if line.strip()]
+
+    return corpus
+
+
+def evaluate(nlp, gate, corpus, batch_size=64):
+    """
+    Compare gated NER with always running NER
+
+    Returns:
+        Dictionary of counts, per-label losses and example misses
+    """
+    started = time.perf_counter()
+    found = [doc_entities(doc) for doc in nlp.pipe(corpus, batch_size=batch_size)]
+    full_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decisions = gate.filter(corpus)
+    gated = [text for text, run in zip(corpus, decisions) if run]
+    list(nlp.pipe(gated, batch_size=batch_size))
+    gated_time = time.perf_counter() - started
+
+    total = lost = 0
+    lost_by_label = {}
+    total_by_label = {}
+    misses = []
+    for text, run, entities in zip(corpus, decisions, found):
+        total += len(entities)
+        for entity in entities:
+            total_by_label[entity['label']] = total_by_label.get(entity['label'], 0) + 1
+        if run or not entities:
+            continue
+        lost += len(entities)
+        misses.append((text, entities))
+        for entity in entities:
+            lost_by_label[entity['label']] = lost_by_label.get(entity['label'], 0) + 1
+
+    return {
+        'queries': len(corpus),
+        'skipped': decisions.count(False),
+        'entities': total,
+        'lost': lost,
+        'recall': 1 - lost / total if total else 1.0,
+        'total_by_label': total_by_label,
+        'lost_by_label': lost_by_label,
+        'misses': misses,
+        'full_time': full_time,
+        'gated_time': gated_time
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', help='text file with one extra query per line')
+    parser.add_argument('--limit', type=int, help='most recent logged conversations read per database')
+    parser.add_argument('--max-tokens', type=int, default=8, help='gate token limit')
+    parser.add_argument('--examples', type=int, default=10, help='missed queries to print')
+    parser.add_argument('--min-recall', type=float, help='exit non-zero below this entity recall')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.queries, args.limit)
+    if not corpus:
+        print("No queries found")
+        sys.exit(1)
+
+    report = evaluate(load_ner_pipeline(), NERGate(max_tokens=args.max_tokens), corpus)
+
+    print("=" * 60)
+    print("NER GATE EVALUATION")
+    print("=" * 60)
+    print(f"Queries:        {report['queries']}")
+    print(f"Skipped:        {report['skipped']} ({report['skipped'] / report['queries']:.1%})")
+    print(f"Entities:       {report['entities']}")
+    print(f"Lost:           {report['lost']}")
+    print(f"Entity recall:  {report['recall']:.2%}")
+    print(f"NER time:       {report['full_time'] * 1000:.1f} ms always, "
+          f"{report['gated_time'] * 1000:.1f} ms gated")
+
+    if report['total_by_label']:
+        print(f"\n{'Label':<14}{'Found':>8}{'Lost':>8}")
+        print("-" * 30)
+        for label, count in sorted(report['total_by_label'].items(), key=lambda item: item[1], reverse=True):
+            print(f"{label:<14}{count:>8}{report['lost_by_label'].get(label, 0):>8}")
+
+    if report['misses']:
+        print("\nSkipped queries with entities:")
+        for text, entities in report['misses'][:args.examples]:
+            print(f"  {text!r}: {[(entity['text'], entity['label']) for entity in entities]}")
+
+    if args.min_recall is not None and report['recall'] < args.min_recall:
+        print(f"\n✗ Entity recall {report['recall']:.2%} is below {args.min_recall:.2%}")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""
+Streaming export of database rows as NDJSON or CSV
+
+Rows are read with fetchmany and each batch is turned into one text chunk
+straight away, so memory stays flat however many rows a query returns.
+The chunk generators can be handed to a Flask streaming response as is.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Format of SQLite CURRENT_TIMESTAMP values
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_bound(value, end=False):
+    """
+    Turn an ISO date or datetime into a timestamp bound
+
+    Args:
+        value: e.g. '2024-10-01' or '2024-10-01T12:30:00'
+        end: A date-only end bound covers that whole day
+
+    Returns:
+        Timestamp string comparable with the stored timestamps
+
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Expected an ISO date string, got {type(value).__name__}")
+    value = value.strip()
+    moment = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        moment += timedelta(days=1)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def conversation_filters(start=None, end=None, session_id=None, alias=''):
+    """
+    WHERE conditions for an export
+
+    Args:
+        start: Inclusive ISO start date or datetime
+        end: ISO end datetime (exclusive) or date (inclusive)
+        session_id: Only this session
+        alias: Table alias prefix, e.g. 'c.'
+
+    Returns:
+        (list of conditions, list of parameters)
+    """
+    where, params = [], []
+    if start:
+        where.append(f'{alias}timestamp >= ?')
+        params.append(parse_bound(start))
+    if end:
+        where.append(f'{alias}timestamp < ?')
+        params.append(parse_bound(end, end=True))
+    if session_id:
+        where.append(f'{alias}session_id = ?')
+        params.append(session_id)
+    return where, params
+
+
+def export_chunks(conn, sql, params=(), format='ndjson', chunk_size=1000, transform=None):
+    """
+    Stream a query as NDJSON lines or CSV rows
+
+    Args:
+        conn: SQLite connection
+        sql: SELECT statement
+        params: Query parameters
+        format: 'ndjson' or 'csv'
+        chunk_size: Rows fetched and emitted per chunk
+        transform: Optional function applied to each row dictionary
+
+    Yields:
+        Text chunks; a CSV export starts with its header row even when empty
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+
+    cursor = conn.execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    try:
+        if format == 'csv':
+            yield _csv_chunk([columns])
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            records = [dict(zip(columns, row)) for row in rows]
+            if transform is not None:
+                records = [transform(record) for record in records]
+
+            if format == 'ndjson':
+                yield ''.join(json.dumps(record, default=str, ensure_ascii=False) + '\n' for record in records)
+            else:
+                yield _csv_chunk([[_csv_value(record.get(column)) for column in columns] for record in records])
+    finally:
+        cursor.close()
+
+
+def _csv_value(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
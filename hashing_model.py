@@ -0,0 +1,343 @@
+"""
+Intent classifier over a fixed-width feature hashing space
+
+TfidfVectorizer keeps a vocabulary dict that grows with the corpus, and
+max_features silently drops n-grams once it is full. HashingIntentModel
+instead maps every term to one of n_features columns with hash_terms, so
+memory is bounded by n_features however large the corpus gets and no term
+is ever dropped (colliding terms share a column).
+
+Training is two passes over the corpus, both of which can run on shards in
+parallel because their results simply add up:
+
+    1. document frequencies per column  -> IDF array, fixed from then on
+    2. TF-IDF weighted counts per class -> MultinomialNB counts
+
+partial_fit adds further samples to the class counts with the fixed IDF, so
+words that first appear in logged traffic still get a column.
+
+Scoring goes through NumpyIntentClassifier, so serving a hashed model never
+imports scikit-learn. Most of the n_features columns are never hit by the
+training corpus, and every such column has the same IDF and log-probability,
+so the classifier and the artifact keep only the columns that were hit plus
+one shared slot for the rest (see compact_parts).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from inference_engine import NumpyIntentClassifier, hash_terms
+
+DEFAULT_N_FEATURES = 2 ** 16
+
+
+def _analyzer(config, idf=None):
+    """NumpyIntentClassifier used only to analyze and vectorize texts"""
+    return NumpyIntentClassifier(
+        vocabulary=None,
+        idf=idf if idf is not None else np.ones(config['n_features']),
+        feature_log_prob=None,
+        class_log_prior=(),
+        classes=(),
+        ngram_range=tuple(config['ngram_range']),
+        stop_words=config['stop_words'],
+        norm=config['norm'],
+        sublinear_tf=config['sublinear_tf'],
+        n_features=config['n_features']
+    )
+
+
+def document_frequencies(texts, config):
+    """
+    First training pass over one shard
+
+    Returns:
+        (documents containing each column, number of documents)
+    """
+    analyzer = _analyzer(config)
+    df = np.zeros(config['n_features'], dtype=np.int64)
+    for text in texts:
+        df[np.unique(hash_terms(analyzer.analyze(text), config['n_features']))] += 1
+    return df, len(texts)
+
+
+def class_counts(texts, labels, classes, idf, config):
+    """
+    Second training pass over one shard
+
+    Args:
+        texts: Preprocessed texts
+        labels: Intent of each text
+        classes: Sorted class labels; labels not in it are skipped
+        idf: IDF array from the first pass
+        config: HashingIntentModel.config
+
+    Returns:
+        (classes x n_features weighted counts, samples per class)
+    """
+    analyzer = _analyzer(config, idf)
+    rows = {label: row for row, label in enumerate(classes)}
+    label_rows = np.array([rows.get(label, -1) for label in labels], dtype=np.intp)
+    known = label_rows >= 0
+    label_rows = label_rows[known]
+
+    entry_rows, indices, values = analyzer.vectorize_batch([text for text, keep in zip(texts, known) if keep])
+    feature_count = np.zeros((len(classes), config['n_features']), dtype=np.float64)
+    np.add.at(feature_count, (label_rows[entry_rows], indices), values)
+    class_count = np.bincount(label_rows, minlength=len(classes)).astype(np.float64)
+    return feature_count, class_count
+
+
+def merge_shards(results):
+    """Sum per-shard results of document_frequencies or class_counts"""
+    results = list(results)
+    return tuple(sum(part) for part in zip(*results))
+
+
+def _shards(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class HashingIntentModel:
+    """Hashed TF-IDF + MultinomialNB, trainable in shards and incrementally"""
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES, alpha=0.1, ngram_range=(1, 2),
+                 stop_words='english', norm='l2', sublinear_tf=False):
+        """
+        Create an unfitted model
+
+        Args:
+            n_features: Width of the hashing space
+            alpha: MultinomialNB smoothing
+            ngram_range: Smallest and largest n-gram counted
+            stop_words: 'english' for scikit-learn's list, an iterable of
+                words, or None
+            norm: 'l2', 'l1' or None
+            sublinear_tf: Use 1 + log(tf) instead of raw counts
+        """
+        if stop_words == 'english':
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+
+        self.alpha = alpha
+        self.config = {
+            'n_features': int(n_features),
+            'ngram_range': tuple(ngram_range),
+            'stop_words': sorted(stop_words or ()),
+            'norm': norm,
+            'sublinear_tf': sublinear_tf
+        }
+        self.idf = None
+        self.classes_ = None
+        self.feature_count = None
+        self.class_count = None
+        self._classifier = None
+        # Compact artifact arrays, expanded once training resumes
+        self._stored = None
+
+    @property
+    def n_features(self):
+        return self.config['n_features']
+
+    def fit(self, texts, labels, workers=1):
+        """
+        Train from scratch
+
+        Args:
+            texts: Preprocessed texts
+            labels: Intent of each text
+            workers: Train shards in this many processes
+        """
+        texts, labels = list(texts), list(labels)
+        classes = sorted(set(labels))
+        text_shards = _shards(texts, workers)
+        label_shards = _shards(labels, workers)
+
+        if workers > 1 and len(text_shards) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                df, n_docs = merge_shards(pool.map(document_frequencies, text_shards,
+                                                   [self.config] * len(text_shards)))
+                idf = self._idf(df, n_docs)
+                counts = merge_shards(pool.map(class_counts, text_shards, label_shards,
+                                               [classes] * len(text_shards), [idf] * len(text_shards),
+                                               [self.config] * len(text_shards)))
+        else:
+            df, n_docs = document_frequencies(texts, self.config)
+            idf = self._idf(df, n_docs)
+            counts = class_counts(texts, labels, classes, idf, self.config)
+
+        self.idf = idf
+        self.classes_ = np.array(classes)
+        self.feature_count, self.class_count = counts
+        self._classifier = None
+        self._stored = None
+        return self
+
+    @staticmethod
+    def _idf(df, n_docs):
+        # TfidfVectorizer's smooth_idf formula
+        return np.log((1 + n_docs) / (1 + df)) + 1.0
+
+    def partial_fit(self, texts, labels):
+        """
+        Add samples of known intents to the class counts
+
+        The IDF stays as fitted; labels the model was not trained on are
+        ignored.
+        """
+        self._expand()
+        feature_count, class_count = class_counts(texts, labels, self.classes_.tolist(), self.idf, self.config)
+        if not self.feature_count.flags.writeable:
+            # Loaded memory-mapped; copy before the first update
+            self.feature_count = np.array(self.feature_count)
+            self.class_count = np.array(self.class_count)
+        self.feature_count += feature_count
+        self.class_count += class_count
+        self._classifier = None
+        return self
+
+    def _expand(self):
+        """Rebuild the full-width idf and counts from compact artifact arrays"""
+        if self._stored is None:
+            return
+        arrays, self._stored = self._stored, None
+        columns = np.asarray(arrays['columns'])
+        self.idf = np.full(self.n_features, arrays['idf'][-1])
+        self.idf[columns] = arrays['idf'][:-1]
+        self.feature_count = np.zeros((len(self.classes_), self.n_features))
+        self.feature_count[:, columns] = arrays['feature_count']
+        self.class_count = np.array(arrays['class_count'])
+
+    def log_probabilities(self):
+        """Full-width MultinomialNB (feature_log_prob, class_log_prior) from the counts"""
+        self._expand()
+        smoothed = self.feature_count + self.alpha
+        feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        class_log_prior = np.log(self.class_count) - np.log(self.class_count.sum())
+        return feature_log_prob, class_log_prior
+
+    def compact_parts(self):
+        """
+        Columns hit in training and their idf, counts and log-probabilities
+
+        Columns nobody hit have no document frequency and no counts, so they
+        share one trailing slot of idf and feature_log_prob.
+
+        Returns:
+            Dictionary of columns, idf, feature_log_prob, class_log_prior,
+            feature_count and class_count arrays
+        """
+        self._expand()
+        unseen_idf = self.idf.max()
+        columns = np.flatnonzero(self.feature_count.any(axis=0) | (self.idf < unseen_idf))
+        feature_count = self.feature_count[:, columns]
+
+        # log_probabilities restricted to columns, plus the value every other column shares
+        log_total = np.log(self.feature_count.sum(axis=1) + self.alpha * self.n_features)[:, np.newaxis]
+        feature_log_prob = np.hstack([np.log(feature_count + self.alpha) - log_total,
+                                      np.log(self.alpha) - log_total])
+        return {
+            'columns': columns,
+            'idf': np.append(self.idf[columns], unseen_idf),
+            'feature_log_prob': feature_log_prob,
+            'class_log_prior': np.log(self.class_count) - np.log(self.class_count.sum()),
+            'feature_count': feature_count,
+            'class_count': self.class_count
+        }
+
+    def to_classifier(self, arrays=None):
+        """
+        NumpyIntentClassifier scoring with this model
+
+        Args:
+            arrays: Compact arrays, e.g. memory-mapped from an artifact;
+                taken from compact_parts if omitted
+        """
+        if arrays is None:
+            arrays = self.compact_parts()
+        config = self.config
+        return NumpyIntentClassifier(
+            vocabulary=None,
+            idf=arrays['idf'],
+            feature_log_prob=arrays['feature_log_prob'],
+            class_log_prior=arrays['class_log_prior'],
+            classes=self.classes_,
+            ngram_range=config['ngram_range'],
+            stop_words=config['stop_words'],
+            norm=config['norm'],
+            sublinear_tf=config['sublinear_tf'],
+            n_features=config['n_features'],
+            columns=arrays.get('columns')
+        )
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            self._classifier = self.to_classifier()
+        return self._classifier
+
+    def predict(self, texts):
+        return self.classifier.predict(texts)
+
+    def predict_proba(self, texts):
+        return self.classifier.predict_proba(texts)
+
+    def artifact_parts(self):
+        """
+        Arrays and manifest fields for model_artifact.save_artifact
+
+        Returns:
+            (arrays dictionary, metadata dictionary)
+        """
+        config = self.config
+        metadata = {
+            'vectorizer': {
+                'hashing': True,
+                'n_features': config['n_features'],
+                'analyzer': 'word',
+                'ngram_range': list(config['ngram_range']),
+                'norm': config['norm'],
+                'smooth_idf': True,
+                'sublinear_tf': config['sublinear_tf'],
+                'use_idf': True
+            },
+            'stop_word_list': config['stop_words'],
+            'classifier': {
+                'alpha': self.alpha,
+                'classes': [str(label) for label in self.classes_]
+            }
+        }
+        return self.compact_parts(), metadata
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """
+        Rebuild a model from a hashed artifact
+
+        The arrays stay memory-mapped until partial_fit first updates them.
+        Artifacts written before compact storage hold full-width arrays.
+
+        Args:
+            artifact: Result of model_artifact.load_artifact
+        """
+        params = artifact['vectorizer']
+        arrays = artifact['arrays']
+        model = cls(
+            n_features=params['n_features'],
+            alpha=artifact['classifier']['alpha'],
+            ngram_range=params['ngram_range'],
+            stop_words=artifact.get('stop_word_list') or None,
+            norm=params.get('norm', 'l2'),
+            sublinear_tf=params.get('sublinear_tf', False)
+        )
+        model.classes_ = np.array(artifact['classifier']['classes'])
+        model._classifier = model.to_classifier(arrays)
+        if 'columns' in arrays:
+            model._stored = arrays
+        else:
+            model.idf = np.asarray(arrays['idf'])
+            model.feature_count = arrays['feature_count']
+            model.class_count = arrays['class_count']
+        return model
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Incremental retraining from logged conversations and feedback
+
+Reads conversations newer than the last run out of the database in chunks,
+keeps those that were positively rated or, when unrated, classified with
+high confidence, and updates the MultinomialNB counts with partial_fit.
+Older conversations are picked up too once a rating arrives that makes them
+positively rated; a feedback-id watermark next to the conversation-id one
+tracks which ratings have been seen.
+
+The TF-IDF vocabulary and IDF weights stay as they were fitted, so the
+corpus is never refit; a hashed model (see hashing_model.py) also counts
+words that are new since training. The result is published as a new model
+artifact; serving workers pick it up with ChatbotModel.start_model_watcher().
+
+    python incremental_trainer.py --db chatbot.db --model chatbot_model
+    python incremental_trainer.py --watch 600
+    python incremental_trainer.py --registry model_registry
+"""
+
+import argparse
+import os
+import time
+
+from chatbot_model import ChatbotModel
+from database import ConnectionPool
+from hashing_model import HashingIntentModel
+from model_artifact import load_artifact
+from model_registry import ModelRegistry
+
+# Conversations past the conversation watermark: average rating when feedback
+# exists (up to the feedback id read at the start of the run), otherwise the
+# classifier's confidence
+LABELLED_SQL = '''
+    SELECT id, query, intent_detected FROM (
+        SELECT c.id, c.query, c.intent_detected, c.confidence,
+               (SELECT AVG(f.rating) FROM feedback f
+                WHERE f.conversation_id = c.id AND f.id <= :feedback_until) AS rating
+        FROM conversations c
+        WHERE c.id > :after_id AND c.intent_detected IS NOT NULL
+    )
+    WHERE rating >= :min_rating OR (rating IS NULL AND confidence >= :min_confidence)
+    ORDER BY id
+'''
+
+# Conversations behind the watermark that were rated since the last run, now
+# rate well, and were not selected back then (rated low, or unrated with low
+# confidence), so nothing is fitted twice
+LATE_RATED_SQL = '''
+    SELECT id, query, intent_detected FROM (
+        SELECT c.id, c.query, c.intent_detected, c.confidence,
+               (SELECT AVG(f.rating) FROM feedback f
+                WHERE f.conversation_id = c.id AND f.id <= :feedback_until) AS rating,
+               (SELECT AVG(f.rating) FROM feedback f
+                WHERE f.conversation_id = c.id AND f.id <= :feedback_after) AS earlier_rating
+        FROM conversations c
+        WHERE c.id <= :after_id AND c.intent_detected IS NOT NULL
+          AND c.id IN (SELECT conversation_id FROM feedback
+                       WHERE id > :feedback_after AND id <= :feedback_until)
+    )
+    WHERE rating >= :min_rating
+      AND NOT CASE WHEN earlier_rating IS NOT NULL THEN earlier_rating >= :min_rating
+                   ELSE COALESCE(confidence >= :min_confidence, 0) END
+    ORDER BY id
+'''
+
+
+class IncrementalTrainer:
+    """Feeds labelled traffic from a conversations database into a ChatbotModel"""
+
+    def __init__(self, model, db_path='chatbot.db', min_confidence=0.8, min_rating=4, chunk_size=500):
+        """
+        Create a trainer
+
+        Args:
+            model: ChatbotModel with the scikit-learn engine or a hashed model
+            db_path: Database with conversations and feedback tables
+            min_confidence: Unrated conversations need at least this confidence
+            min_rating: Rated conversations need at least this average rating
+            chunk_size: Conversations read and fitted per partial_fit call
+        """
+        self.model = model
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        self.min_confidence = min_confidence
+        self.min_rating = min_rating
+        self.chunk_size = chunk_size
+
+    @property
+    def source_key(self):
+        """Key of this database's watermark in the model's training_state"""
+        return os.path.basename(self.db_path)
+
+    def latest_feedback_id(self):
+        conn = self.pool.new_connection()
+        try:
+            return conn.execute('SELECT COALESCE(MAX(id), 0) FROM feedback').fetchone()[0]
+        finally:
+            conn.close()
+
+    def iter_labelled_chunks(self, sql, after_id, feedback_after, feedback_until):
+        """
+        Yield labelled conversations selected by LABELLED_SQL or LATE_RATED_SQL
+
+        Args:
+            sql: One of the two queries
+            after_id: Conversation watermark
+            feedback_after: Feedback watermark of the previous run
+            feedback_until: Latest feedback id counted in this run
+
+        Yields:
+            List of (id, query, intent) rows, at most chunk_size long
+        """
+        params = {
+            'after_id': after_id,
+            'feedback_after': feedback_after,
+            'feedback_until': feedback_until,
+            'min_rating': self.min_rating,
+            'min_confidence': self.min_confidence
+        }
+        conn = self.pool.new_connection()
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def ensure_counts(self):
+        """Make sure the classifier carries the counts partial_fit updates"""
+        self.model.wait_until_ready(components=['nltk', 'classifier'])
+        if self.model.model is None:
+            raise ValueError("Incremental training needs the scikit-learn engine")
+        if isinstance(self.model.model, HashingIntentModel):
+            return
+
+        classifier = self.model.model.named_steps['classifier']
+        if not hasattr(classifier, 'feature_count_'):
+            # Artifacts written before counts were stored: refit the base corpus once
+            print("Model artifact has no class counts; retraining the base model first")
+            self.model.train_model()
+
+    def update(self, publish=True, registry=None):
+        """
+        Fit every new labelled conversation and publish the model
+
+        New conversations are read past the conversation watermark; older
+        ones count once a rating arrives that makes them positively rated.
+
+        Args:
+            publish: Save the updated model as the artifact at model_path
+            registry: Publish to this ModelRegistry as a new version instead
+
+        Returns:
+            Report dictionary
+        """
+        started = time.perf_counter()
+        self.ensure_counts()
+
+        pipeline = self.model.model
+        if isinstance(pipeline, HashingIntentModel):
+            classifier = pipeline
+
+            def fit_chunk(texts, labels):
+                pipeline.partial_fit(texts, labels)
+        else:
+            vectorizer = pipeline.named_steps['tfidf']
+            classifier = pipeline.named_steps['classifier']
+
+            def fit_chunk(texts, labels):
+                classifier.partial_fit(vectorizer.transform(texts), labels)
+        known = set(str(label) for label in classifier.classes_)
+
+        state = dict(self.model.training_state)
+        watermarks = dict(state.get('conversations', {}))
+        feedback_watermarks = dict(state.get('feedback', {}))
+        after_id = watermarks.get(self.source_key, 0)
+        feedback_after = feedback_watermarks.get(self.source_key)
+        feedback_until = self.latest_feedback_id()
+
+        passes = [(False, self.iter_labelled_chunks(LABELLED_SQL, after_id, feedback_after or 0, feedback_until))]
+        if feedback_after is not None:
+            passes.append((True, self.iter_labelled_chunks(LATE_RATED_SQL, after_id, feedback_after, feedback_until)))
+        # Otherwise the state predates feedback tracking: start tracking from now
+
+        scanned = fitted = late_rated = unknown_intent = empty = 0
+        last_id = after_id
+        for late, chunks in passes:
+            for rows in chunks:
+                scanned += len(rows)
+                if late:
+                    late_rated += len(rows)
+                else:
+                    last_id = rows[-1][0]
+
+                texts, labels = [], []
+                for _, query, intent in rows:
+                    if intent not in known:
+                        unknown_intent += 1
+                        continue
+                    processed = self.model.preprocess_text(query)
+                    if not processed:
+                        empty += 1
+                        continue
+                    texts.append(processed)
+                    labels.append(intent)
+
+                if texts:
+                    fit_chunk(texts, labels)
+                    fitted += len(texts)
+
+        report = {
+            'scanned': scanned,
+            'fitted': fitted,
+            'late_rated': late_rated,
+            'unknown_intent': unknown_intent,
+            'empty': empty,
+            'last_conversation_id': last_id,
+            'published': False,
+            'seconds': 0.0
+        }
+
+        watermarks[self.source_key] = last_id
+        feedback_watermarks[self.source_key] = feedback_until
+        state['conversations'] = watermarks
+        state['feedback'] = feedback_watermarks
+
+        if fitted:
+            state['incremental_samples'] = state.get('incremental_samples', 0) + fitted
+            state['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            self.model.training_state = state
+            self.model.set_classifier()
+            if publish and registry is not None:
+                report['version'] = registry.publish(self.model)
+                report['published'] = True
+                report['artifact_hash'] = self.model.artifact_hash
+            elif publish:
+                self.model.save_model()
+                report['published'] = True
+                report['artifact_hash'] = self.model.artifact_hash
+        else:
+            # Nothing usable: remember the watermarks without publishing a new model
+            self.model.training_state = state
+
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+
+def print_report(report):
+    print(f"Scanned {report['scanned']} labelled conversations ({report['late_rated']} rated late), "
+          f"fitted {report['fitted']} ({report['unknown_intent']} unknown intent, {report['empty']} empty) "
+          f"in {report['seconds']:.2f}s")
+    if report['published']:
+        print(f"Published artifact {report['artifact_hash'][:12]} "
+              f"(through conversation {report['last_conversation_id']})")
+    else:
+        print("No new training data; artifact unchanged")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default='chatbot.db', help='database with conversations and feedback')
+    parser.add_argument('--model', default='chatbot_model', help='model artifact directory')
+    parser.add_argument('--min-confidence', type=float, default=0.8)
+    parser.add_argument('--min-rating', type=float, default=4)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--watch', type=float, help='keep running, updating every this many seconds')
+    parser.add_argument('--registry', help='publish new versions to this model registry directory')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry) if args.registry else None
+    model = ChatbotModel(model_path=args.model, startup='lazy')
+    if registry is not None and registry.current():
+        # Continue from the active version rather than the standalone artifact
+        model.wait_until_ready(components=['classifier'])
+        model.apply_artifact(load_artifact(registry.path(registry.current())), registry.current())
+    trainer = IncrementalTrainer(model, args.db, args.min_confidence, args.min_rating, args.chunk_size)
+
+    while True:
+        print_report(trainer.update(registry=registry))
+        if not args.watch:
+            break
+        time.sleep(args.watch)
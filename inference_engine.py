@@ -0,0 +1,317 @@
+"""
+Pure-NumPy scoring for the TF-IDF + MultinomialNB intent classifier
+
+At serving time the trained pipeline only needs a vocabulary lookup, IDF
+weighting, normalization and one product against feature_log_prob_.
+NumpyIntentClassifier does exactly that without importing scikit-learn, and
+exposes the predict / predict_proba / classes_ subset ChatbotModel uses.
+
+Models trained in hashing mode (see hashing_model.py) have no vocabulary:
+terms are mapped to one of n_features columns by hash_terms instead. Their
+arrays can be compact, holding only the hashed columns seen in training plus
+one shared slot for every other column.
+"""
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+
+def _strip_accents_unicode(text):
+    normalized = unicodedata.normalize('NFKD', text)
+    if normalized == text:
+        return text
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+def hash_terms(terms, n_features):
+    """
+    Feature index of each term in a fixed-width hashing space
+
+    CRC-32 of the UTF-8 term modulo n_features: stable across processes and
+    Python versions, unlike hash().
+
+    Returns:
+        Integer array, one index per term
+    """
+    hashes = np.fromiter((zlib.crc32(term.encode('utf-8')) for term in terms),
+                         dtype=np.int64, count=len(terms))
+    return hashes % n_features
+
+
+class NumpyIntentClassifier:
+    """TF-IDF vectorization and MultinomialNB scoring with NumPy only"""
+
+    def __init__(self, vocabulary, idf, feature_log_prob, class_log_prior, classes,
+                 ngram_range=(1, 1), lowercase=True, token_pattern=r"(?u)\b\w\w+\b",
+                 stop_words=(), norm='l2', use_idf=True, sublinear_tf=False,
+                 binary=False, strip_accents=None, n_features=None, columns=None):
+        """
+        Create an engine from fitted parameters
+
+        Args:
+            vocabulary: Dictionary mapping term to feature index, or None
+                to hash terms into n_features columns
+            idf: IDF weight per feature
+            feature_log_prob: Class x feature log-probability matrix
+            class_log_prior: Log prior per class
+            classes: Class labels
+            ngram_range, lowercase, token_pattern, norm, use_idf,
+            sublinear_tf, binary, strip_accents: TfidfVectorizer settings
+            stop_words: Iterable of stop words removed before n-gramming
+            n_features: Width of the hashing space when vocabulary is None
+            columns: Sorted hashed columns that have their own slot in idf
+                and feature_log_prob; any other column shares the final
+                slot. None when the arrays span all n_features columns
+        """
+        if norm not in ('l1', 'l2', None):
+            raise ValueError(f"Unsupported norm: {norm}")
+        if vocabulary is None and not n_features:
+            raise ValueError("Hashing mode needs n_features")
+
+        self.vocabulary = vocabulary
+        self.n_features = n_features if vocabulary is None else len(vocabulary)
+        self.columns = None if columns is None else np.asarray(columns)
+        # Slot of each compact hashed column, looked up like a vocabulary
+        self.slots = None if columns is None else {column: slot for slot, column in enumerate(self.columns.tolist())}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = np.asarray(class_log_prior, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.min_n, self.max_n = ngram_range
+        self.lowercase = lowercase
+        self.token_re = re.compile(token_pattern)
+        self.stop_words = frozenset(stop_words or ())
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.strip_accents = {
+            None: None,
+            'unicode': _strip_accents_unicode,
+            'ascii': _strip_accents_ascii
+        }[strip_accents]
+
+    @classmethod
+    def from_pipeline(cls, model):
+        """
+        Export an engine from a fitted scikit-learn pipeline
+
+        Args:
+            model: Pipeline with 'tfidf' and 'classifier' steps
+        """
+        vectorizer = model.named_steps['tfidf']
+        classifier = model.named_steps['classifier']
+        cls._check_analyzer(vectorizer.analyzer, vectorizer.tokenizer, vectorizer.preprocessor)
+
+        return cls(
+            vocabulary=dict(vectorizer.vocabulary_),
+            idf=vectorizer.idf_,
+            feature_log_prob=np.asarray(classifier.feature_log_prob_),
+            class_log_prior=classifier.class_log_prior_,
+            classes=classifier.classes_,
+            ngram_range=tuple(vectorizer.ngram_range),
+            lowercase=vectorizer.lowercase,
+            token_pattern=vectorizer.token_pattern,
+            stop_words=vectorizer.get_stop_words(),
+            norm=vectorizer.norm,
+            use_idf=vectorizer.use_idf,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+            strip_accents=vectorizer.strip_accents
+        )
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """
+        Create an engine from a loaded model artifact
+
+        The class matrix stays memory-mapped; columns are gathered per query.
+
+        Args:
+            artifact: Result of model_artifact.load_artifact
+        """
+        arrays = artifact['arrays']
+        params = artifact['vectorizer']
+        cls._check_analyzer(params.get('analyzer', 'word'))
+
+        stop_words = artifact.get('stop_word_list')
+        if stop_words is None and params.get('stop_words') == 'english':
+            # Artifacts written before the list was stored
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+        elif stop_words is None and isinstance(params.get('stop_words'), list):
+            stop_words = params['stop_words']
+
+        if params.get('hashing'):
+            vocabulary = None
+        else:
+            vocabulary = {term: index for index, term in enumerate(arrays['vocabulary'].tolist())}
+
+        return cls(
+            vocabulary=vocabulary,
+            idf=arrays['idf'],
+            feature_log_prob=arrays['feature_log_prob'],
+            class_log_prior=arrays['class_log_prior'],
+            classes=artifact['classifier']['classes'],
+            ngram_range=tuple(params.get('ngram_range', (1, 1))),
+            lowercase=params.get('lowercase', True),
+            token_pattern=params.get('token_pattern', r"(?u)\b\w\w+\b"),
+            stop_words=stop_words,
+            norm=params.get('norm', 'l2'),
+            use_idf=params.get('use_idf', True),
+            sublinear_tf=params.get('sublinear_tf', False),
+            binary=params.get('binary', False),
+            strip_accents=params.get('strip_accents'),
+            n_features=params.get('n_features'),
+            columns=arrays.get('columns')
+        )
+
+    @staticmethod
+    def _check_analyzer(analyzer, tokenizer=None, preprocessor=None):
+        if analyzer != 'word' or tokenizer is not None or preprocessor is not None:
+            raise ValueError("Only the default word analyzer is supported")
+
+    def analyze(self, text):
+        """
+        Split text into the terms TfidfVectorizer would count
+
+        Returns:
+            List of unigrams and n-grams, stop words removed
+        """
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents:
+            text = self.strip_accents(text)
+
+        tokens = self.token_re.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        if self.max_n == 1:
+            return tokens
+
+        terms = list(tokens) if self.min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(self.min_n, 2), min(self.max_n, n_tokens) + 1):
+            for start in range(n_tokens - n + 1):
+                terms.append(' '.join(tokens[start:start + n]))
+        return terms
+
+    def vectorize(self, text):
+        """
+        TF-IDF vector of one text in sparse form
+
+        Returns:
+            (feature indices, weights)
+        """
+        _, indices, values = self.vectorize_batch([text])
+        return indices, values
+
+    def vectorize_batch(self, texts):
+        """
+        TF-IDF vectors of many texts in coordinate form
+
+        Only term lookup and counting run per text; weighting and
+        normalization are single array operations over the whole batch.
+
+        Returns:
+            (row per entry, feature index per entry, weight per entry),
+            grouped by row in order. With compact hashed arrays the indices
+            are slots of idf and feature_log_prob, not hashed columns
+        """
+        if self.vocabulary is None:
+            n_features = self.n_features
+
+            def lookup(term):
+                # hash_terms for a single term
+                return zlib.crc32(term.encode('utf-8')) % n_features
+        else:
+            lookup = self.vocabulary.get
+
+        slots = self.slots
+        unseen = len(slots) if slots is not None else None
+
+        rows = []
+        columns = []
+        counts = []
+        for row, text in enumerate(texts):
+            row_counts = {}
+            for term in self.analyze(text):
+                index = lookup(term)
+                if index is not None:
+                    row_counts[index] = row_counts.get(index, 0) + 1
+            if slots is None:
+                columns.extend(row_counts.keys())
+            else:
+                # Counted per hashed column first, so unseen columns keep separate weights
+                columns.extend(slots.get(column, unseen) for column in row_counts)
+            counts.extend(row_counts.values())
+            rows.extend([row] * len(row_counts))
+
+        rows = np.asarray(rows, dtype=np.intp)
+        indices = np.asarray(columns, dtype=np.intp)
+        values = np.asarray(counts, dtype=np.float64)
+
+        if self.binary:
+            values[:] = 1.0
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.use_idf:
+            values *= self.idf[indices]
+
+        if self.norm is not None:
+            if self.norm == 'l2':
+                lengths = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+            else:
+                lengths = np.bincount(rows, weights=np.abs(values), minlength=len(texts))
+            lengths[lengths == 0] = 1.0
+            values /= lengths[rows]
+
+        return rows, indices, values
+
+    def joint_log_likelihood(self, texts):
+        """Unnormalized class log-likelihoods, one row per text"""
+        jll = np.tile(self.class_log_prior, (len(texts), 1))
+        rows, indices, values = self.vectorize_batch(texts)
+        if not len(rows):
+            return jll
+
+        if rows[0] == rows[-1]:
+            # Every term belongs to one text, e.g. a single query
+            jll[rows[0]] += self.feature_log_prob[:, indices] @ values
+            return jll
+
+        # One gather of the batch's columns, then a per-text sum of the products
+        weighted = self.feature_log_prob[:, indices] * values
+        starts = np.concatenate(([0], np.flatnonzero(rows[1:] != rows[:-1]) + 1))
+        jll[rows[starts]] += np.add.reduceat(weighted, starts, axis=1).T
+        return jll
+
+    def predict_log_proba(self, texts):
+        jll = self.joint_log_likelihood(texts)
+        peak = jll.max(axis=1, keepdims=True)
+        log_norm = peak + np.log(np.exp(jll - peak).sum(axis=1, keepdims=True))
+        return jll - log_norm
+
+    def predict_proba(self, texts):
+        """
+        Class probabilities for each text
+
+        Args:
+            texts: List of preprocessed texts
+
+        Returns:
+            Array of shape (len(texts), len(classes_))
+        """
+        return np.exp(self.predict_log_proba(texts))
+
+    def predict(self, texts):
+        """Most likely class label for each text"""
+        return self.classes_[self.joint_log_likelihood(texts).argmax(axis=1)]
@@ -0,0 +1,213 @@
+"""
+Knowledge served from the intents/responses tables
+
+KnowledgeStore loads every intent and response from a DatabaseManager into
+a KnowledgeSnapshot: read-only mappings, response tuples and a precompiled
+PatternMatcher. Requests only ever read the current snapshot, so answering
+a query never touches the database. A watcher thread polls the
+knowledge_version counter (bumped by triggers on both tables) and swaps in
+a freshly built snapshot when it changes, so edits go live without a
+restart.
+
+Intents named "category/subcategory" are routed by the matcher, which is
+how app.py's knowledge is stored. Other intents, such as the classifier
+intents used by ChatbotModel, are still available through `intents`.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from matcher import PatternMatcher
+
+CATEGORY_SEPARATOR = '/'
+
+Intent = namedtuple('Intent', ['name', 'category', 'subcategory', 'patterns', 'responses'])
+
+
+class KnowledgeSnapshot:
+    """Immutable view of the knowledge at one version"""
+
+    __slots__ = ('version', 'intents', 'categories', 'matcher', 'pattern_targets', 'loaded_at')
+
+    def __init__(self, version, intents):
+        """
+        Build lookup structures for a list of intents
+
+        Args:
+            version: knowledge_version the rows were read at
+            intents: Dictionaries from DatabaseManager.load_knowledge
+        """
+        by_name = {}
+        categories = {}
+        patterns = []
+        targets = []
+
+        for data in intents:
+            category, _, subcategory = data['name'].partition(CATEGORY_SEPARATOR)
+            routed = bool(subcategory)
+            intent = Intent(
+                name=data['name'],
+                category=category if routed else None,
+                subcategory=subcategory if routed else None,
+                patterns=tuple(pattern.lower() for pattern in data['patterns']),
+                responses=tuple(data['responses'])
+            )
+            by_name[intent.name] = intent
+
+            if routed:
+                categories.setdefault(category, {})[subcategory] = intent
+                for pattern in intent.patterns:
+                    patterns.append(pattern)
+                    targets.append(intent)
+
+        self.version = version
+        self.intents = MappingProxyType(by_name)
+        self.categories = MappingProxyType({
+            category: MappingProxyType(subcats) for category, subcats in categories.items()
+        })
+        self.matcher = PatternMatcher(patterns)
+        self.pattern_targets = tuple(targets)
+        self.loaded_at = time.time()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, 'loaded_at'):
+            raise AttributeError("KnowledgeSnapshot is immutable")
+        object.__setattr__(self, name, value)
+
+    def lookup(self, category, subcategory):
+        """
+        Get a routed intent
+
+        Returns:
+            Intent, or None if the snapshot has no such intent
+        """
+        return self.categories.get(category, {}).get(subcategory)
+
+
+class KnowledgeStore:
+    """Current KnowledgeSnapshot of a database, reloaded when it changes"""
+
+    def __init__(self, db, on_swap=None):
+        """
+        Load the first snapshot
+
+        Args:
+            db: DatabaseManager owning the intents and responses tables
+            on_swap: Optional callable receiving each newly swapped-in snapshot
+        """
+        self.db = db
+        self.on_swap = on_swap
+        self.swaps = 0
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = KnowledgeSnapshot(*db.load_knowledge())
+
+    @property
+    def snapshot(self):
+        """The current snapshot; read it once and use it for a whole request"""
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def refresh(self, force=False):
+        """
+        Swap in a new snapshot if the knowledge version changed
+
+        Args:
+            force: Reload even if the version is unchanged
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._refresh_lock:
+            if not force and self.db.get_knowledge_version() == self._snapshot.version:
+                return False
+
+            snapshot = KnowledgeSnapshot(*self.db.load_knowledge())
+            # A single reference assignment; readers see the old or the new snapshot
+            self._snapshot = snapshot
+            self.swaps += 1
+
+        print(f"Knowledge reloaded: version {snapshot.version}, {len(snapshot.intents)} intents")
+        if self.on_swap is not None:
+            self.on_swap(snapshot)
+        return True
+
+    def seed(self, knowledge_base):
+        """
+        Import a nested {category: {subcategory: {patterns, responses}}}
+        dictionary if none of its intents exist yet
+
+        Safe to call from every worker at once: DatabaseManager.seed_knowledge
+        checks and imports in one write transaction.
+
+        Args:
+            knowledge_base: Dictionary in app.py's KNOWLEDGE_BASE layout
+
+        Returns:
+            True if the dictionary was imported
+        """
+        if self._snapshot.categories:
+            return False
+
+        intents = []
+        responses = []
+        for category, subcats in knowledge_base.items():
+            for subcategory, data in subcats.items():
+                name = f'{category}{CATEGORY_SEPARATOR}{subcategory}'
+                intents.append((name, None, list(data['patterns'])))
+                responses.extend((name, text) for text in data['responses'])
+
+        seeded = self.db.seed_knowledge(intents, responses)
+        self.refresh()
+        return seeded
+
+    def start_watching(self, interval=5.0):
+        """
+        Poll the knowledge version on a background thread
+
+        Args:
+            interval: Seconds between version checks
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,),
+                                        name='knowledge-watcher', daemon=True)
+        self._thread.start()
+
+    def stop_watching(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the last good snapshot
+                self.last_error = str(e)
+                print(f"Error reloading knowledge: {e}")
+
+    def get_stats(self):
+        """Get version and reload counters for health checks"""
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'intents': len(snapshot.intents),
+            'routed_patterns': len(snapshot.pattern_targets),
+            'loaded_at': snapshot.loaded_at,
+            'swaps': self.swaps,
+            'watching': self._thread is not None,
+            'last_error': self.last_error
+        }
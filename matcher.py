@@ -0,0 +1,92 @@
+from collections import deque
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a fixed list of substring patterns.
+
+    The automaton is built once; each scan walks the text a single time, so
+    the cost depends on the text length and the number of hits rather than
+    on how many patterns were compiled in.
+    """
+
+    def __init__(self, patterns):
+        """
+        Build the automaton
+
+        Args:
+            patterns: Ordered iterable of pattern strings
+        """
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._always = []
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                # An empty pattern is a substring of every text
+                self._always.append(index)
+                continue
+            self._insert(pattern, index)
+
+        self._build_failure_links()
+
+    def _insert(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                # Inherit matches that end at the failure state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """
+        Find every pattern occurring in text
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Sorted list of indices into self.patterns, each at most once
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found = set(self._always)
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return sorted(found)
+
+    def __len__(self):
+        return len(self.patterns)
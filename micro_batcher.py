@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects independent requests into small batches for one batch function.
+
+    Callers submit single items and get a Future back. A background thread
+    waits for the first item, keeps collecting for up to max_wait seconds or
+    max_batch items, runs the whole batch in one call and resolves each
+    caller's future. Typical use is in front of the intent classifier:
+
+        batcher = MicroBatcher(model.process_queries, max_wait=0.005, max_batch=32)
+        intent, confidence, response, entities = batcher.process(query)
+    """
+
+    _STOP = object()
+
+    def __init__(self, process_batch, max_wait=0.005, max_batch=32, name='micro-batcher'):
+        """
+        Start the batching thread
+
+        Args:
+            process_batch: Callable taking a list of items and returning a
+                list of results in the same order
+            max_wait: Maximum seconds the first item of a batch waits for company
+            max_batch: Maximum items per batch
+            name: Thread name
+        """
+        self.process_batch = process_batch
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+
+        self.queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._closed = False
+        self.reset_metrics()
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queue an item for the next batch
+
+        Args:
+            item: Single input for process_batch
+
+        Returns:
+            Future resolved with the item's result
+        """
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Micro-batcher is closed"))
+            return future
+        self.queue.put((item, future, time.monotonic()))
+        return future
+
+    def process(self, item, timeout=None):
+        """Submit an item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def close(self):
+        """Finish queued work and stop the batching thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self.batches = 0
+            self.items = 0
+            self.batch_sizes = {}
+            self.queue_delay_total = 0.0
+            self.queue_delay_max = 0.0
+            self.batch_time_total = 0.0
+
+    def get_metrics(self):
+        """
+        Get batching metrics
+
+        Returns:
+            Dictionary with batch count, batch size histogram and queueing delay
+        """
+        with self._metrics_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "avg_queue_delay_ms": round(self.queue_delay_total / self.items * 1000, 3) if self.items else 0.0,
+                "max_queue_delay_ms": round(self.queue_delay_max * 1000, 3),
+                "avg_batch_time_ms": round(self.batch_time_total / self.batches * 1000, 3) if self.batches else 0.0,
+                "pending": self.queue.qsize()
+            }
+
+    def _collect_batch(self):
+        """Wait for a first item, then gather more until the batch is full or max_wait passes"""
+        first = self.queue.get()
+        if first is self._STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is self._STOP:
+                return batch, True
+            batch.append(entry)
+
+        return batch, False
+
+    def _run_batch(self, batch):
+        started = time.monotonic()
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch function returned {len(results)} results for {len(items)} items")
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        finished = time.monotonic()
+        with self._metrics_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+            self.batch_time_total += finished - started
+            for _, _, enqueued in batch:
+                delay = started - enqueued
+                self.queue_delay_total += delay
+                self.queue_delay_max = max(self.queue_delay_max, delay)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect_batch()
+            if batch:
+                self._run_batch(batch)
+
+        # Anything queued after the stop marker is still processed
+        while True:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not self._STOP:
+                self._run_batch([entry])
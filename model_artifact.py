@@ -0,0 +1,337 @@
+"""
+Versioned on-disk format for the trained chatbot model
+
+An artifact is a directory of published versions plus a pointer to the
+active one:
+
+    chatbot_model/
+        CURRENT              name of the active version directory
+        3f9a0c2e71d4b8a5/    one version, named after its content hash
+
+Each version directory holds:
+
+    manifest.json            format version, content hash, vectorizer and
+                             classifier parameters, stop words, training data,
+                             responses
+    vocabulary.npy           terms ordered by feature index (absent for
+                             hashed models, see hashing_model.py)
+    columns.npy              hashed models only: hashed column of each feature
+                             but the last, which stands for every other column
+    idf.npy                  IDF weight per feature
+    feature_log_prob.npy     MultinomialNB log-probabilities (classes x features)
+    class_log_prior.npy      MultinomialNB log prior per class
+    feature_count.npy        optional MultinomialNB counts (classes x features)
+    class_count.npy          optional samples seen per class
+
+The optional count arrays let the classifier be updated with partial_fit
+instead of being refit; `training_state` in the manifest records how far
+incremental training has read.
+
+The arrays are plain NumPy files, so they can be memory-mapped read-only and
+shared between forked workers, and nothing is unpickled on load.
+
+Saving writes a new version directory and then replaces CURRENT with
+os.replace, so a reader always finds a complete artifact: the old one or the
+new one. The last few superseded versions are kept for readers that resolved
+CURRENT just before it moved. Directories written before versioning hold the
+version files directly and are still read.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+FORMAT_NAME = 'student-chatbot-model'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+# Manifest fields written by save_artifact itself; the rest is metadata
+MANIFEST_FIELDS = ('format', 'format_version', 'created_at', 'files', 'content_hash')
+POINTER = 'CURRENT'
+# Superseded versions kept next to the active one
+KEEP_VERSIONS = 2
+VERSION_RE = re.compile(r'^[0-9a-f]{16}$')
+ARRAYS = ('vocabulary', 'idf', 'feature_log_prob', 'class_log_prior')
+HASHING_ARRAYS = ('idf', 'feature_log_prob', 'class_log_prior')
+OPTIONAL_ARRAYS = ('feature_count', 'class_count')
+# Absent from hashed artifacts written before they were stored compactly
+HASHING_OPTIONAL_ARRAYS = ('columns',)
+
+# TfidfVectorizer parameters that affect transform() and are JSON-serializable
+VECTORIZER_PARAMS = (
+    'analyzer', 'binary', 'lowercase', 'ngram_range', 'norm', 'smooth_idf',
+    'stop_words', 'strip_accents', 'sublinear_tf', 'token_pattern', 'use_idf',
+    'max_df', 'min_df', 'max_features'
+)
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, corrupt or of an unknown version"""
+
+
+def write_atomic(path, text):
+    """Replace a small text file so readers see either the old or the new content"""
+    temporary = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def resolve_artifact(path):
+    """Directory holding the active version's manifest and arrays"""
+    try:
+        with open(os.path.join(path, POINTER), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        # Written before versioning, or nothing there yet
+        return path
+    return os.path.join(path, version) if version else path
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(resolve_artifact(path), MANIFEST))
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _content_hash(file_hashes, metadata):
+    digest = hashlib.sha256()
+    for name in sorted(file_hashes):
+        digest.update(f"{name}:{file_hashes[name]}\n".encode('utf-8'))
+    digest.update(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def is_hashing(artifact):
+    """Whether a loaded artifact holds a HashingIntentModel"""
+    return bool(artifact['vectorizer'].get('hashing'))
+
+
+def _pipeline_parts(model):
+    vectorizer = model.named_steps['tfidf']
+    classifier = model.named_steps['classifier']
+
+    vocabulary = vectorizer.vocabulary_
+    terms = sorted(vocabulary, key=vocabulary.get)
+
+    params = vectorizer.get_params()
+    metadata = {
+        'vectorizer': {name: params[name] for name in VECTORIZER_PARAMS if name in params},
+        'stop_word_list': sorted(vectorizer.get_stop_words() or []),
+        'classifier': {
+            'alpha': classifier.alpha,
+            'classes': [str(label) for label in classifier.classes_]
+        }
+    }
+
+    arrays = {
+        'vocabulary': np.array(terms, dtype=str),
+        'idf': np.ascontiguousarray(vectorizer.idf_, dtype=np.float64),
+        'feature_log_prob': np.ascontiguousarray(classifier.feature_log_prob_, dtype=np.float64),
+        'class_log_prior': np.ascontiguousarray(classifier.class_log_prior_, dtype=np.float64)
+    }
+    for name in OPTIONAL_ARRAYS:
+        if hasattr(classifier, f'{name}_'):
+            arrays[name] = np.ascontiguousarray(getattr(classifier, f'{name}_'), dtype=np.float64)
+    return arrays, metadata
+
+
+def save_artifact(path, model, training_data, responses, training_state=None):
+    """
+    Write a trained model as an artifact directory
+
+    The directory is written next to the destination and renamed into place,
+    so readers never see a half-written artifact.
+
+    Args:
+        path: Destination directory
+        model: Fitted Pipeline with 'tfidf' and 'classifier' steps, or a
+            fitted HashingIntentModel
+        training_data: Intent training data
+        responses: Intent responses
+        training_state: JSON-serializable bookkeeping for incremental training
+
+    Returns:
+        Content hash of the written artifact
+    """
+    if hasattr(model, 'artifact_parts'):
+        arrays, metadata = model.artifact_parts()
+        arrays = {name: np.ascontiguousarray(array, dtype=np.int64 if name == 'columns' else np.float64)
+                  for name, array in arrays.items()}
+    else:
+        arrays, metadata = _pipeline_parts(model)
+    metadata = dict(metadata, training_data=training_data, responses=responses,
+                    training_state=training_state or {})
+    metadata = json.loads(json.dumps(metadata))
+
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+    staging = os.path.join(path, f".tmp-{os.getpid()}-{threading.get_ident()}-{int(time.time() * 1000)}")
+    os.makedirs(staging)
+
+    try:
+        file_hashes = {}
+        for name in arrays:
+            file_path = os.path.join(staging, f"{name}.npy")
+            np.save(file_path, arrays[name], allow_pickle=False)
+            file_hashes[name] = _file_hash(file_path)
+
+        manifest = {
+            'format': FORMAT_NAME,
+            'format_version': FORMAT_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'files': file_hashes,
+            'content_hash': _content_hash(file_hashes, metadata),
+            **metadata
+        }
+        with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        version = manifest['content_hash'][:16]
+        target = os.path.join(path, version)
+        if os.path.isdir(target):
+            # Same content saved before; mark it newest so it is not pruned
+            shutil.rmtree(staging, ignore_errors=True)
+            os.utime(target)
+        else:
+            os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    write_atomic(os.path.join(path, POINTER), version)
+    _prune_versions(path, version)
+    return manifest['content_hash']
+
+
+def _prune_versions(path, active):
+    """Drop all but the newest superseded versions, and pre-versioning files"""
+    superseded = [name for name in os.listdir(path) if VERSION_RE.match(name) and name != active]
+    superseded.sort(key=lambda name: os.path.getmtime(os.path.join(path, name)), reverse=True)
+    for name in superseded[KEEP_VERSIONS:]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    for name in (MANIFEST,) + tuple(f"{name}.npy" for name in ARRAYS + HASHING_OPTIONAL_ARRAYS + OPTIONAL_ARRAYS):
+        legacy = os.path.join(path, name)
+        if os.path.isfile(legacy):
+            os.remove(legacy)
+
+
+def read_content_hash(path):
+    """
+    Content hash from an artifact's manifest without loading its arrays
+
+    Returns:
+        The hash, or None if there is no readable artifact at path
+    """
+    try:
+        with open(os.path.join(resolve_artifact(path), MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f).get('content_hash')
+    except (OSError, ValueError):
+        return None
+
+
+def load_artifact(path, mmap=True, verify=False):
+    """
+    Read an artifact directory
+
+    The manifest's content hash is always checked against its file hashes
+    and metadata. Hashing the array files themselves reads every byte, so
+    it is left to publishing and the command line.
+
+    Args:
+        path: Artifact directory
+        mmap: Memory-map the arrays read-only instead of reading them
+        verify: Also check every array file's hash against the manifest
+
+    Returns:
+        Dictionary with the manifest fields and an 'arrays' dictionary
+    """
+    path = resolve_artifact(path)
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.isfile(manifest_path):
+        raise ArtifactError(f"No model artifact at {path}")
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format') != FORMAT_NAME:
+        raise ArtifactError(f"{path} is not a {FORMAT_NAME} artifact")
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact version {manifest.get('format_version')} at {path}")
+
+    metadata = {name: value for name, value in manifest.items() if name not in MANIFEST_FIELDS}
+    if _content_hash(manifest.get('files', {}), metadata) != manifest.get('content_hash'):
+        raise ArtifactError(f"Manifest content hash mismatch in {path}")
+
+    if is_hashing(manifest):
+        required, optional = HASHING_ARRAYS, HASHING_OPTIONAL_ARRAYS + OPTIONAL_ARRAYS
+    else:
+        required, optional = ARRAYS, OPTIONAL_ARRAYS
+    arrays = {}
+    for name in required + tuple(name for name in optional if name in manifest['files']):
+        file_path = os.path.join(path, f"{name}.npy")
+        if verify and _file_hash(file_path) != manifest['files'].get(name):
+            raise ArtifactError(f"Hash mismatch for {name}.npy in {path}")
+        arrays[name] = np.load(file_path, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+    manifest['arrays'] = arrays
+    return manifest
+
+
+def build_pipeline(artifact):
+    """
+    Rebuild a scikit-learn pipeline from a loaded artifact
+
+    The classifier matrices stay memory-mapped; only the vocabulary dict is
+    materialized per process, as TfidfVectorizer needs it for lookups.
+
+    Args:
+        artifact: Result of load_artifact
+
+    Returns:
+        Pipeline ready for predict and predict_proba
+    """
+    if is_hashing(artifact):
+        raise ArtifactError("Hashed models have no scikit-learn pipeline; use HashingIntentModel.from_artifact")
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    arrays = artifact['arrays']
+    params = dict(artifact['vectorizer'])
+    if 'ngram_range' in params:
+        params['ngram_range'] = tuple(params['ngram_range'])
+
+    terms = arrays['vocabulary'].tolist()
+    vectorizer = TfidfVectorizer(**params, vocabulary={term: index for index, term in enumerate(terms)})
+    vectorizer.idf_ = np.asarray(arrays['idf'])
+
+    classifier = MultinomialNB(alpha=artifact['classifier']['alpha'])
+    classifier.classes_ = np.array(artifact['classifier']['classes'])
+    classifier.feature_log_prob_ = arrays['feature_log_prob']
+    classifier.class_log_prior_ = np.asarray(arrays['class_log_prior'])
+    classifier.n_features_in_ = len(terms)
+    if 'feature_count' in arrays and 'class_count' in arrays:
+        # Copies, so partial_fit can update them in place
+        classifier.feature_count_ = np.array(arrays['feature_count'])
+        classifier.class_count_ = np.array(arrays['class_count'])
+
+    return Pipeline([
+        ('tfidf', vectorizer),
+        ('classifier', classifier)
+    ])
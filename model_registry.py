@@ -0,0 +1,356 @@
+"""
+Versioned model registry with hot-swapping workers
+
+A registry is a directory of artifact versions plus a pointer to the active
+one:
+
+    model_registry/
+        v000001/            model artifact (see model_artifact.py)
+        v000002/
+        CURRENT             name of the active version
+        history.json        versions in activation order, for rollback
+
+Publishing writes a new version directory and then replaces CURRENT with
+os.replace, so a reader sees either the old or the new pointer. Each
+serving worker runs a RegistryWatcher (app.py starts one when
+CHATBOT_MODEL_REGISTRY is set): when CURRENT changes it loads the
+new version on the watcher thread, warms it with canary queries and only
+then swaps it in with ChatbotModel.swap_serving. Requests never wait for a
+load, and a version that fails its canary is never served.
+
+    registry = ModelRegistry('model_registry')
+    registry.publish(trained_model)
+
+    watcher = RegistryWatcher(model, registry, interval=10)
+    watcher.start()
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from model_artifact import is_artifact, load_artifact, resolve_artifact, save_artifact, write_atomic
+
+CURRENT = 'CURRENT'
+HISTORY = 'history.json'
+VERSION_RE = re.compile(r'^v(\d+)$')
+
+
+class RegistryError(Exception):
+    """Raised for unknown versions or a rollback with nothing to roll back to"""
+
+
+class ModelRegistry:
+    """Directory of versioned model artifacts with an active-version pointer"""
+
+    def __init__(self, root='model_registry'):
+        """
+        Open or create a registry
+
+        Args:
+            root: Registry directory
+        """
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Published versions, oldest first"""
+        found = []
+        for name in os.listdir(self.root):
+            match = VERSION_RE.match(name)
+            if match and is_artifact(self.path(name)):
+                found.append((int(match.group(1)), name))
+        return [name for _, name in sorted(found)]
+
+    def current(self):
+        """Name of the active version, or None if nothing is active"""
+        try:
+            with open(os.path.join(self.root, CURRENT), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version or None
+
+    def history(self):
+        """Activated versions, oldest first"""
+        try:
+            with open(os.path.join(self.root, HISTORY), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _next_version(self):
+        versions = self.versions()
+        number = int(VERSION_RE.match(versions[-1]).group(1)) + 1 if versions else 1
+        return f"v{number:06d}"
+
+    def publish(self, model, activate=True):
+        """
+        Save a trained ChatbotModel as the next version
+
+        The model's artifact_hash and version are updated to match.
+
+        Args:
+            model: ChatbotModel with a fitted scikit-learn pipeline
+            activate: Make the new version the active one
+
+        Returns:
+            Version name
+        """
+        with self._lock:
+            version = self._next_version()
+            model.artifact_hash = save_artifact(self.path(version), model.model, model.training_data,
+                                                model.responses, model.training_state)
+            model.version = version
+        print(f"Published model version {version} ({model.artifact_hash[:12]})")
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def import_artifact(self, path, activate=True):
+        """
+        Copy an existing artifact directory in as the next version
+
+        Args:
+            path: Artifact directory, e.g. chatbot_model
+            activate: Make the new version the active one
+
+        Returns:
+            Version name
+        """
+        # Imports are rare, so every array file is hashed
+        load_artifact(path, verify=True)
+        source = resolve_artifact(path)
+
+        with self._lock:
+            version = self._next_version()
+            staging = f"{self.path(version)}.tmp-{os.getpid()}"
+            shutil.copytree(source, staging)
+            os.rename(staging, self.path(version))
+        print(f"Imported {path} as model version {version}")
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at a published version and record it in the history"""
+        if not is_artifact(self.path(version)):
+            raise RegistryError(f"Unknown model version: {version}")
+
+        with self._lock:
+            history = self.history()
+            history.append(version)
+            write_atomic(os.path.join(self.root, HISTORY), json.dumps(history))
+            write_atomic(os.path.join(self.root, CURRENT), version)
+        print(f"Activated model version {version}")
+
+    def rollback(self):
+        """
+        Re-activate the version that was active before the current one
+
+        Returns:
+            The version rolled back to
+        """
+        with self._lock:
+            history = self.history()
+            current = self.current()
+            while history and history[-1] == current:
+                history.pop()
+            if not history:
+                raise RegistryError("No earlier version to roll back to")
+
+            version = history[-1]
+            write_atomic(os.path.join(self.root, HISTORY), json.dumps(history))
+            write_atomic(os.path.join(self.root, CURRENT), version)
+        print(f"Rolled back to model version {version}")
+        return version
+
+
+class RegistryWatcher:
+    """Loads, warms and swaps in the registry's active version for one model"""
+
+    def __init__(self, model, registry, interval=10.0, canary_queries=None,
+                 min_canary_accuracy=0.8, warmup_rounds=3):
+        """
+        Create a watcher
+
+        Args:
+            model: Serving ChatbotModel
+            registry: ModelRegistry to follow
+            interval: Seconds between checks of CURRENT
+            canary_queries: (query, expected intent) pairs; defaults to the
+                first pattern of every intent in the candidate's training data
+            min_canary_accuracy: Share of canaries the candidate must classify
+                as expected
+            warmup_rounds: Times the canary batch is scored before the swap,
+                touching memory-mapped pages and lazy caches; it is always
+                scored at least once
+        """
+        self.model = model
+        self.registry = registry
+        self.interval = interval
+        self.canary_queries = canary_queries
+        self.min_canary_accuracy = min_canary_accuracy
+        self.warmup_rounds = warmup_rounds
+
+        self.rejected = {}
+        self.swaps = 0
+        self.last_swap_seconds = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def canaries_for(self, serving):
+        if self.canary_queries is not None:
+            return list(self.canary_queries)
+        return [(data['patterns'][0], intent)
+                for intent, data in serving.training_data.items() if data.get('patterns')]
+
+    def run_canary(self, serving):
+        """
+        Score the canary set with a candidate ServingModel
+
+        Returns:
+            (passed, accuracy)
+        """
+        canaries = self.canaries_for(serving)
+        texts, expected = [], []
+        for query, intent in canaries:
+            processed = self.model.preprocess_text(query)
+            if processed:
+                texts.append(processed)
+                expected.append(intent)
+        if not texts:
+            return True, None
+
+        classifier = serving.classifier
+        probabilities = classifier.predict_proba(texts)
+        for _ in range(self.warmup_rounds - 1):
+            classifier.predict_proba(texts)
+
+        if probabilities.shape != (len(texts), len(classifier.classes_)) or not np.all(np.isfinite(probabilities)):
+            return False, 0.0
+
+        predicted = classifier.classes_[probabilities.argmax(axis=1)]
+        accuracy = float(np.mean([str(label) == intent for label, intent in zip(predicted, expected)]))
+        return accuracy >= self.min_canary_accuracy, accuracy
+
+    def check(self):
+        """
+        Swap in the active version if it differs from the served one
+
+        Returns:
+            True if a new version was swapped in
+        """
+        with self._lock:
+            version = self.registry.current()
+            if version is None or version == self.model.version or version in self.rejected:
+                return False
+
+            started = time.perf_counter()
+            try:
+                serving = self.model.build_serving(load_artifact(self.registry.path(version)), version)
+                passed, accuracy = self.run_canary(serving)
+            except Exception as e:
+                self.rejected[version] = str(e)
+                print(f"Model version {version} failed to load: {e}")
+                return False
+
+            if not passed:
+                self.rejected[version] = f"canary accuracy {accuracy:.2%}"
+                print(f"Model version {version} rejected: canary accuracy {accuracy:.2%} "
+                      f"below {self.min_canary_accuracy:.2%}")
+                return False
+
+            previous = self.model.swap_serving(serving)
+            self.swaps += 1
+            self.last_swap_seconds = time.perf_counter() - started
+            print(f"Swapped model {previous.version or 'initial'} -> {version} "
+                  f"in {self.last_swap_seconds * 1000:.0f} ms")
+            return True
+
+    def rollback(self):
+        """Roll the registry back one version and follow it immediately"""
+        version = self.registry.rollback()
+        self.rejected.pop(version, None)
+        self.check()
+        return version
+
+    def start(self):
+        """Check the registry now and then every interval seconds on a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-registry-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        # A swap before the initial model has loaded would be overwritten by it
+        self.model.wait_until_ready(components=['nltk', 'classifier'])
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking model registry: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def get_stats(self):
+        return {
+            'current': self.registry.current(),
+            'serving': self.model.version,
+            'swaps': self.swaps,
+            'last_swap_seconds': self.last_swap_seconds,
+            'rejected': dict(self.rejected)
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the versioned model registry')
+    parser.add_argument('--root', default='model_registry', help='registry directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='show versions and the active one')
+    import_parser = commands.add_parser('import', help='add an artifact directory as a new version')
+    import_parser.add_argument('path', nargs='?', default='chatbot_model')
+    import_parser.add_argument('--no-activate', action='store_true')
+    activate_parser = commands.add_parser('activate', help='make a version active')
+    activate_parser.add_argument('version')
+    commands.add_parser('rollback', help='re-activate the previous version')
+    commands.add_parser('verify', help='hash every array file of every version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        current = registry.current()
+        for version in registry.versions():
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version}")
+    elif args.command == 'import':
+        registry.import_artifact(args.path, activate=not args.no_activate)
+    elif args.command == 'activate':
+        registry.activate(args.version)
+    elif args.command == 'verify':
+        for version in registry.versions():
+            load_artifact(registry.path(version), mmap=False, verify=True)
+            print(f"✓ {version}")
+    else:
+        registry.rollback()
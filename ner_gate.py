@@ -0,0 +1,121 @@
+"""
+Cheap pre-filter deciding whether a query is worth running NER on
+
+Most chat traffic is short lowercase keyword queries ("library timings",
+"bye") where en_core_web_sm finds nothing. A query goes to spaCy only if it
+shows a surface signal of an entity: a capitalized word after the first one,
+an acronym, a digit or currency sign, a date/time or number word, or more
+tokens than short keyword queries have. evaluate_ner_gate.py measures how
+many entities the gate loses against always running NER.
+"""
+
+import re
+import threading
+
+TOKEN_RE = re.compile(r"[^\W_]+(?:['’.][^\W_]+)*")
+DIGIT_OR_SYMBOL_RE = re.compile(r'[\d$€£¥₹%]')
+
+MONTH_WORDS = frozenset([
+    'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+    'september', 'october', 'november', 'december',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+])
+
+DAY_WORDS = frozenset([
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+    'mon', 'tue', 'tues', 'wed', 'thu', 'thur', 'thurs', 'fri', 'sat', 'sun',
+    'today', 'tomorrow', 'yesterday', 'tonight', 'weekend', 'weekday',
+    'morning', 'afternoon', 'evening', 'noon', 'midnight',
+    'week', 'weeks', 'month', 'months', 'year', 'years', 'semester', 'annual',
+    'hour', 'hours', 'minute', 'minutes', 'daily', 'weekly', 'monthly', 'yearly'
+])
+
+NUMBER_WORDS = frozenset([
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine',
+    'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+    'seventeen', 'eighteen', 'nineteen', 'twenty', 'thirty', 'forty', 'fifty',
+    'sixty', 'seventy', 'eighty', 'ninety', 'hundred', 'thousand', 'million',
+    'first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth',
+    'ninth', 'tenth', 'last', 'next', 'half', 'dozen', 'once', 'twice',
+    'rupees', 'rs', 'dollars', 'percent'
+])
+
+TRIGGER_WORDS = MONTH_WORDS | DAY_WORDS | NUMBER_WORDS
+
+
+class NERGate:
+    """Decides per query whether NER can be skipped, and counts the decisions"""
+
+    def __init__(self, max_tokens=8, trigger_words=TRIGGER_WORDS):
+        """
+        Create a gate
+
+        Args:
+            max_tokens: Queries with more tokens always run NER
+            trigger_words: Lowercase words that always run NER
+        """
+        self.max_tokens = max_tokens
+        self.trigger_words = frozenset(trigger_words)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def needs_ner(self, text):
+        """
+        Check whether a query may contain a named entity
+
+        Args:
+            text: Raw user query
+
+        Returns:
+            True if NER should run
+        """
+        if not text:
+            return False
+        if DIGIT_OR_SYMBOL_RE.search(text):
+            return True
+
+        tokens = TOKEN_RE.findall(text)
+        if len(tokens) > self.max_tokens:
+            return True
+
+        for position, token in enumerate(tokens):
+            if token.lower() in self.trigger_words:
+                return True
+            if len(token) > 1 and token.isupper():
+                return True
+            # The first word is usually capitalized by habit, not because it is a name
+            if position > 0 and token[0].isupper():
+                return True
+        return False
+
+    def filter(self, texts):
+        """
+        Apply the gate to a batch and update the counters
+
+        Args:
+            texts: List of raw queries
+
+        Returns:
+            List of booleans, True where NER should run
+        """
+        decisions = [self.needs_ner(text) for text in texts]
+        skipped = decisions.count(False)
+        with self._lock:
+            self.checked += len(decisions)
+            self.skipped += skipped
+        return decisions
+
+    def reset_stats(self):
+        with self._lock:
+            self.checked = 0
+            self.skipped = 0
+
+    def get_stats(self):
+        """Get how many queries were checked and skipped"""
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'skipped': self.skipped,
+                'ran': self.checked - self.skipped,
+                'skip_rate': self.skipped / self.checked if self.checked else 0.0
+            }
@@ -0,0 +1,115 @@
+"""
+Content-addressed on-disk cache of preprocessed training patterns
+
+Each entry is keyed by a SHA-256 of the preprocessing configuration and the
+raw pattern text, so a retrain only preprocesses patterns that are new or
+changed, and any change to the stop words, tokenizer behaviour or
+PREPROCESS_VERSION gets fresh keys instead of stale results. Entries live
+in a small SQLite file and are shared by every process training from it.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+from database import MAX_QUERY_PARAMS
+
+# Bump whenever ChatbotModel.preprocess_text changes its output
+PREPROCESS_VERSION = 1
+
+
+def config_fingerprint(config):
+    """Stable digest of a JSON-serializable preprocessing configuration"""
+    encoded = json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class PatternCache:
+    """Preprocessed text by content hash, persisted in SQLite"""
+
+    def __init__(self, path='pattern_cache.db'):
+        """
+        Create a cache backed by an SQLite file
+
+        Args:
+            path: SQLite file holding the entries
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        # The file is only created once something is preprocessed through it
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS preprocessed (
+                key TEXT PRIMARY KEY,
+                processed TEXT NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        return conn
+
+    @staticmethod
+    def key(fingerprint, text):
+        return hashlib.sha256(f"{fingerprint}\n{text}".encode('utf-8')).hexdigest()
+
+    def preprocess(self, texts, function, config):
+        """
+        Preprocess texts, reusing cached results
+
+        Args:
+            texts: Raw texts
+            function: Preprocessing function, called only for cache misses
+            config: Everything function's output depends on
+
+        Returns:
+            List of preprocessed texts in the order given
+        """
+        fingerprint = config_fingerprint(config)
+        keys = [self.key(fingerprint, text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        conn = self._connect()
+        try:
+            found = {}
+            for start in range(0, len(unique_keys), MAX_QUERY_PARAMS):
+                batch = unique_keys[start:start + MAX_QUERY_PARAMS]
+                placeholders = ','.join('?' * len(batch))
+                found.update(conn.execute(
+                    f'SELECT key, processed FROM preprocessed WHERE key IN ({placeholders})', batch
+                ))
+
+            computed = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in computed:
+                    computed[key] = function(text)
+
+            if computed:
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO preprocessed (key, processed) VALUES (?, ?)',
+                                     computed.items())
+        finally:
+            conn.close()
+
+        self.hits += len(found)
+        self.misses += len(computed)
+        found.update(computed)
+        return [found[key] for key in keys]
+
+    def clear(self):
+        """Drop every entry"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM preprocessed')
+        finally:
+            conn.close()
+
+    def get_stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute('SELECT COUNT(*) FROM preprocessed').fetchone()[0]
+        finally:
+            conn.close()
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+
+class QueryResultCache:
+    """
+    Bounded LRU cache of query analysis results.
+
+    Keys are normalized query strings. Only the deterministic part of a
+    result (intent, confidence, entities) belongs here; anything randomized,
+    such as the chosen response text, is produced after the lookup.
+
+    Every clear() starts a new generation. A writer that reads generation
+    before computing a value and passes it to put() never stores a result
+    computed before a clear() that happened meanwhile.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Create an empty cache
+
+        Args:
+            maxsize: Maximum number of entries, 0 disables caching
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def get(self, key):
+        """
+        Look up a key and mark it as recently used
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entry if full
+
+        Args:
+            key: Normalized query string
+            value: Result to cache
+            generation: Value of generation read before the result was
+                computed; the value is dropped if the cache was cleared since
+        """
+        if not self.maxsize:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the knowledge base or model changes"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+            self.generation += 1
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class CachedPayload:
+    """A serialized payload with its validators"""
+
+    def __init__(self, body, etag, last_modified, expires_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class TTLResponseCache:
+    """
+    Time-limited cache for one JSON payload with single-flight refresh.
+
+    When the entry expires, the first caller recomputes it while concurrent
+    callers wait on the same lock and then reuse the result, so N
+    simultaneous misses cost one computation. The ETag is a hash of the
+    payload without its volatile keys, so unchanged data keeps the same ETag
+    and Last-Modified across refreshes.
+    """
+
+    def __init__(self, compute, ttl=10, volatile_keys=('timestamp',)):
+        """
+        Create the cache
+
+        Args:
+            compute: Callable returning the payload dictionary
+            ttl: Seconds an entry stays fresh
+            volatile_keys: Keys ignored when deciding whether the payload changed
+        """
+        self.compute = compute
+        self.ttl = ttl
+        self.volatile_keys = volatile_keys
+        self.hits = 0
+        self.misses = 0
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Get the cached payload, recomputing it if it has expired
+
+        Returns:
+            CachedPayload
+        """
+        entry = self._entry
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            entry = self._entry
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            self._entry = self._refresh(entry)
+            return self._entry
+
+    def invalidate(self):
+        """Force the next get() to recompute"""
+        with self._lock:
+            if self._entry is not None:
+                self._entry.expires_at = 0
+
+    def _refresh(self, previous):
+        payload = self.compute()
+
+        stable = {key: value for key, value in payload.items() if key not in self.volatile_keys}
+        digest = hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        expires_at = time.monotonic() + self.ttl
+
+        if previous is not None and previous.etag == digest:
+            # Same data: keep the validators so clients still get 304
+            previous.expires_at = expires_at
+            return previous
+
+        return CachedPayload(
+            body=json.dumps(payload, default=str),
+            etag=digest,
+            last_modified=datetime.now(timezone.utc).replace(microsecond=0),
+            expires_at=expires_at
+        )
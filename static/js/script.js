@@ -30,6 +30,7 @@ let conversationHistory = JSON.parse(localStorage.getItem('conversationHistory')
 let isRecording = false;
 let currentTheme = localStorage.getItem('theme') || 'light';
 let analyticsData = null;
+let statisticsETag = null;
 
 // Markdown parser
 const md = window.markdownit({
@@ -431,13 +432,26 @@ async function loadSuggestions(category = 'academics') {
 
 async function updateStatistics(showNotification = false) {
     try {
-        const response = await fetch('/api/statistics');
+        const headers = statisticsETag ? { 'If-None-Match': statisticsETag } : {};
+        const response = await fetch('/api/statistics', { headers, cache: 'no-store' });
+        
+        // Nothing changed since the last poll
+        if (response.status === 304 && analyticsData) {
+            lastUpdated.textContent = new Date().toLocaleTimeString([], {
+                hour: '2-digit',
+                minute: '2-digit',
+                second: '2-digit'
+            });
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error('Statistics API not available');
         }
         
         const data = await response.json();
         analyticsData = data;
+        statisticsETag = response.headers.get('ETag');
         
         // Update analytics dashboard
         updateAnalyticsUI(data);
@@ -0,0 +1,234 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class StatisticsTracker:
+    """
+    Running conversation statistics, kept in the conversations database.
+
+    An AFTER INSERT trigger on the conversations table updates counters,
+    per-category counts, hourly rollups, each session's last active day and
+    per-query counts in the same transaction as the insert. Every worker
+    process reads the same numbers, nothing is lost between a write and a
+    rebuild, and /api/statistics never scans the conversations table.
+    Conversations are counted once the write-behind logger has stored them.
+    """
+
+    SESSION_WINDOW_DAYS = 30
+    SUCCESS_CONFIDENCE = 0.7
+
+    TABLES = ('stats_totals', 'stats_categories', 'stats_hourly', 'stats_sessions', 'stats_queries')
+
+    def __init__(self):
+        self._maintenance = None
+
+    def install(self, conn):
+        """
+        Create the statistics tables and trigger, filling them from the
+        conversations table when they are new
+
+        Safe to run from every worker at once: the check and the fill run in
+        one write transaction.
+
+        Args:
+            conn: Open connection to the conversations database
+        """
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            new = conn.execute('''SELECT COUNT(*) FROM sqlite_master
+                                  WHERE type = 'table' AND name = 'stats_totals' ''').fetchone()[0] == 0
+            conn.execute('''CREATE TABLE IF NOT EXISTS stats_totals (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                total INTEGER NOT NULL,
+                                confidence_sum REAL NOT NULL,
+                                confidence_count INTEGER NOT NULL,
+                                successful INTEGER NOT NULL
+                            )''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS stats_categories (
+                                category TEXT PRIMARY KEY,
+                                count INTEGER NOT NULL
+                            )''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS stats_hourly (
+                                hour TEXT PRIMARY KEY,
+                                count INTEGER NOT NULL
+                            )''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS stats_sessions (
+                                session_id TEXT PRIMARY KEY,
+                                last_day TEXT NOT NULL
+                            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_stats_sessions_day ON stats_sessions(last_day)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS stats_queries (
+                                query TEXT PRIMARY KEY,
+                                count INTEGER NOT NULL
+                            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_stats_queries_count ON stats_queries(count)')
+
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_conversations_stats
+                AFTER INSERT ON conversations
+                BEGIN
+                    UPDATE stats_totals SET
+                        total = total + 1,
+                        confidence_sum = confidence_sum + COALESCE(NEW.confidence, 0),
+                        confidence_count = confidence_count + (NEW.confidence IS NOT NULL),
+                        successful = successful + COALESCE(NEW.confidence >= {self.SUCCESS_CONFIDENCE}, 0)
+                    WHERE id = 1;
+                    INSERT INTO stats_categories (category, count)
+                        SELECT NEW.category, 1 WHERE NEW.category IS NOT NULL
+                        ON CONFLICT (category) DO UPDATE SET count = count + 1;
+                    INSERT INTO stats_hourly (hour, count)
+                        SELECT strftime('%Y-%m-%d %H', NEW.timestamp), 1 WHERE NEW.timestamp IS NOT NULL
+                        ON CONFLICT (hour) DO UPDATE SET count = count + 1;
+                    INSERT INTO stats_sessions (session_id, last_day)
+                        SELECT NEW.session_id, DATE(NEW.timestamp)
+                        WHERE NEW.session_id IS NOT NULL AND NEW.timestamp IS NOT NULL
+                        ON CONFLICT (session_id) DO UPDATE SET last_day = MAX(last_day, excluded.last_day);
+                    INSERT INTO stats_queries (query, count)
+                        SELECT NEW.query, 1 WHERE true
+                        ON CONFLICT (query) DO UPDATE SET count = count + 1;
+                END
+            ''')
+
+            if new:
+                self._fill(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _fill(self, conn):
+        """Recompute every statistics table from the conversations table"""
+        for table in self.TABLES:
+            conn.execute(f'DELETE FROM {table}')
+
+        conn.execute('''INSERT INTO stats_totals (id, total, confidence_sum, confidence_count, successful)
+                        SELECT 1, COUNT(*), COALESCE(SUM(confidence), 0), COUNT(confidence),
+                               COALESCE(SUM(confidence >= ?), 0)
+                        FROM conversations''', (self.SUCCESS_CONFIDENCE,))
+        conn.execute('''INSERT INTO stats_categories (category, count)
+                        SELECT category, COUNT(*) FROM conversations
+                        WHERE category IS NOT NULL GROUP BY category''')
+        conn.execute('''INSERT INTO stats_hourly (hour, count)
+                        SELECT strftime('%Y-%m-%d %H', timestamp), COUNT(*) FROM conversations
+                        WHERE timestamp >= datetime('now', '-25 hours') GROUP BY 1''')
+        conn.execute('''INSERT INTO stats_sessions (session_id, last_day)
+                        SELECT session_id, MAX(DATE(timestamp)) FROM conversations
+                        WHERE session_id IS NOT NULL AND timestamp >= datetime('now', ?)
+                        GROUP BY session_id''',
+                     (f'-{self.SESSION_WINDOW_DAYS + 1} days',))
+        conn.execute('''INSERT INTO stats_queries (query, count)
+                        SELECT query, COUNT(*) FROM conversations GROUP BY query''')
+
+    def rebuild(self, conn):
+        """
+        Recompute the statistics from the conversations table
+
+        The trigger keeps them exact, so this is only a repair tool, e.g.
+        after rows were changed with the trigger dropped. Inserts wait for
+        the write transaction, so none is missed or counted twice.
+
+        Args:
+            conn: Open connection to the conversations database
+        """
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._fill(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def prune(self, conn, now=None):
+        """
+        Drop hourly rollups and sessions that have fallen out of every
+        reporting window
+
+        Args:
+            conn: Open connection to the conversations database
+            now: UTC reference time, defaults to now
+        """
+        now = now or datetime.utcnow()
+        oldest_hour = (now - timedelta(hours=25)).strftime('%Y-%m-%d %H')
+        oldest_day = (now - timedelta(days=self.SESSION_WINDOW_DAYS + 1)).strftime('%Y-%m-%d')
+
+        with conn:
+            conn.execute('DELETE FROM stats_hourly WHERE hour < ?', (oldest_hour,))
+            conn.execute('DELETE FROM stats_sessions WHERE last_day < ?', (oldest_day,))
+
+    def snapshot(self, conn, now=None, top_n=5):
+        """
+        Get the current statistics
+
+        All tables are read in one transaction, so the numbers agree with
+        each other.
+
+        Args:
+            conn: Open connection to the conversations database
+            now: UTC reference time, defaults to now
+            top_n: Number of common queries to report
+
+        Returns:
+            Dictionary of counters and distributions
+        """
+        now = now or datetime.utcnow()
+        today = now.strftime('%Y-%m-%d')
+        window_start = (now - timedelta(days=self.SESSION_WINDOW_DAYS)).strftime('%Y-%m-%d')
+        recent_start = (now - timedelta(hours=24)).strftime('%Y-%m-%d %H')
+
+        conn.execute('BEGIN')
+        try:
+            totals = conn.execute('''SELECT total, confidence_sum, confidence_count, successful
+                                     FROM stats_totals WHERE id = 1''').fetchone() or (0, 0.0, 0, 0)
+            unique_sessions = conn.execute('SELECT COUNT(*) FROM stats_sessions WHERE last_day >= ?',
+                                           (window_start,)).fetchone()[0]
+            recent = conn.execute('SELECT COALESCE(SUM(count), 0) FROM stats_hourly WHERE hour >= ?',
+                                  (recent_start,)).fetchone()[0]
+            today_count = conn.execute('SELECT COALESCE(SUM(count), 0) FROM stats_hourly WHERE hour LIKE ?',
+                                       (f'{today}%',)).fetchone()[0]
+            categories = conn.execute('SELECT category, count FROM stats_categories '
+                                      'ORDER BY count DESC').fetchall()
+            common_queries = conn.execute('SELECT query, count FROM stats_queries ORDER BY count DESC LIMIT ?',
+                                          (top_n,)).fetchall()
+        finally:
+            conn.commit()
+
+        total, confidence_sum, confidence_count, successful = totals
+        return {
+            "total": total,
+            "confidence_sum": confidence_sum,
+            "confidence_count": confidence_count,
+            "successful": successful,
+            "unique_sessions": unique_sessions,
+            "recent": recent,
+            "today": today_count,
+            "categories": categories,
+            "common_queries": common_queries
+        }
+
+    def start_maintenance(self, job, interval=300):
+        """
+        Run a maintenance job periodically on a daemon thread
+
+        Args:
+            job: Callable, e.g. one that prunes this tracker
+            interval: Seconds between runs
+        """
+        if self._maintenance is not None:
+            return
+
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    job()
+                except Exception as e:
+                    print(f"Error maintaining statistics: {e}")
+
+        self._maintenance = stop
+        threading.Thread(target=run, name='statistics-maintenance', daemon=True).start()
+
+    def stop_maintenance(self):
+        if self._maintenance is not None:
+            self._maintenance.set()
+            self._maintenance = None
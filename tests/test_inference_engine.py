@@ -0,0 +1,144 @@
+"""Parity between NumpyIntentClassifier and the scikit-learn pipeline"""
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from chatbot_model import build_tfidf_pipeline
+from hashing_model import HashingIntentModel
+from inference_engine import NumpyIntentClassifier
+from model_artifact import load_artifact, save_artifact
+
+TOLERANCE = 1e-9
+TRAINING_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'data', 'training_data.json')
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    with open(TRAINING_DATA, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def samples(training_data):
+    texts, labels = [], []
+    for intent, data in training_data.items():
+        for pattern in data['patterns']:
+            texts.append(pattern.lower())
+            labels.append(intent)
+    return texts, labels
+
+
+@pytest.fixture(scope='module')
+def pipeline(samples):
+    return build_tfidf_pipeline().fit(*samples)
+
+
+@pytest.fixture(scope='module')
+def corpus(samples, pipeline):
+    """Training texts, unseen words, empty input and random vocabulary mixes"""
+    rng = random.Random(42)
+    terms = list(pipeline.named_steps['tfidf'].vocabulary_)
+    corpus = list(samples[0]) + [
+        "when is the exam",
+        "library library library timings",
+        "what is the weather today",
+        "",
+        "zzz qqq"
+    ]
+    corpus += [' '.join(rng.choice(terms) for _ in range(rng.randint(1, 6))) for _ in range(200)]
+    return corpus
+
+
+@pytest.fixture(scope='module')
+def artifact_dir(tmp_path_factory, training_data, pipeline):
+    path = str(tmp_path_factory.mktemp('artifact') / 'model')
+    save_artifact(path, pipeline, training_data, {})
+    return path
+
+
+@pytest.fixture(scope='module', params=['from_pipeline', 'from_artifact'])
+def engine(request, pipeline, artifact_dir):
+    if request.param == 'from_pipeline':
+        return NumpyIntentClassifier.from_pipeline(pipeline)
+    return NumpyIntentClassifier.from_artifact(load_artifact(artifact_dir))
+
+
+def test_classes_match(engine, pipeline):
+    assert list(engine.classes_) == list(pipeline.classes_)
+
+
+def test_batch_matches_sklearn(engine, pipeline, corpus):
+    np.testing.assert_allclose(engine.predict_proba(corpus), pipeline.predict_proba(corpus),
+                               rtol=0, atol=TOLERANCE)
+    assert list(engine.predict(corpus)) == list(pipeline.predict(corpus))
+
+
+def test_single_queries_match_sklearn(engine, pipeline, corpus):
+    for text in corpus[:60]:
+        np.testing.assert_allclose(engine.predict_proba([text]), pipeline.predict_proba([text]),
+                                   rtol=0, atol=TOLERANCE)
+        assert engine.predict([text])[0] == pipeline.predict([text])[0]
+
+
+@pytest.mark.parametrize('text', ['', 'zzz qqq', 'the and of'])
+def test_queries_without_known_terms_score_the_prior(engine, pipeline, text):
+    probabilities = engine.predict_proba([text])
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba([text]), rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(probabilities[0], np.exp(engine.class_log_prior), rtol=0, atol=TOLERANCE)
+
+
+def test_batch_with_empty_rows_matches_single_queries(engine):
+    texts = ['', 'exam schedule', 'zzz', '', 'library timings', '']
+    batch = engine.predict_proba(texts)
+    for row, text in enumerate(texts):
+        np.testing.assert_allclose(batch[row], engine.predict_proba([text])[0], rtol=0, atol=TOLERANCE)
+
+
+@pytest.fixture(scope='module')
+def hashed(samples):
+    return HashingIntentModel(n_features=2 ** 12).fit(*samples)
+
+
+@pytest.fixture(scope='module')
+def full_width(hashed):
+    """Reference classifier over every hashed column"""
+    feature_log_prob, class_log_prior = hashed.log_probabilities()
+    config = hashed.config
+    return NumpyIntentClassifier(
+        vocabulary=None,
+        idf=hashed.idf,
+        feature_log_prob=feature_log_prob,
+        class_log_prior=class_log_prior,
+        classes=hashed.classes_,
+        ngram_range=config['ngram_range'],
+        stop_words=config['stop_words'],
+        norm=config['norm'],
+        sublinear_tf=config['sublinear_tf'],
+        n_features=config['n_features']
+    )
+
+
+@pytest.fixture(scope='module', params=['compact', 'artifact'])
+def compact(request, hashed, tmp_path_factory, training_data):
+    if request.param == 'compact':
+        return hashed.to_classifier()
+    path = str(tmp_path_factory.mktemp('hashed') / 'model')
+    save_artifact(path, hashed, training_data, {})
+    return NumpyIntentClassifier.from_artifact(load_artifact(path))
+
+
+def test_compact_hashed_classifier_matches_full_width(compact, full_width, corpus):
+    assert compact.columns is not None
+    assert len(compact.idf) < full_width.n_features
+
+    np.testing.assert_allclose(compact.predict_proba(corpus), full_width.predict_proba(corpus),
+                               rtol=0, atol=TOLERANCE)
+    assert list(compact.predict(corpus)) == list(full_width.predict(corpus))
+    for text in ['', 'zzz qqq', corpus[0]]:
+        np.testing.assert_allclose(compact.predict_proba([text]), full_width.predict_proba([text]),
+                                   rtol=0, atol=TOLERANCE)
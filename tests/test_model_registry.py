@@ -0,0 +1,58 @@
+"""RegistryWatcher canary checks"""
+
+import pytest
+
+from chatbot_model import ChatbotModel, build_tfidf_pipeline
+from model_artifact import load_artifact, save_artifact
+from model_registry import ModelRegistry, RegistryWatcher
+
+
+class CountingClassifier:
+    """Wraps a classifier and counts predict_proba calls"""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.classes_ = classifier.classes_
+        self.calls = 0
+
+    def predict_proba(self, texts):
+        self.calls += 1
+        return self.classifier.predict_proba(texts)
+
+
+@pytest.fixture(scope='module')
+def model():
+    return ChatbotModel(startup='lazy')
+
+
+@pytest.fixture(scope='module')
+def serving(model, tmp_path_factory):
+    training_data = model.get_default_training_data()
+    texts, labels = [], []
+    for intent, data in training_data.items():
+        for pattern in data['patterns']:
+            texts.append(model.preprocess_text(pattern))
+            labels.append(intent)
+
+    path = str(tmp_path_factory.mktemp('artifact') / 'model')
+    save_artifact(path, build_tfidf_pipeline().fit(texts, labels), training_data, {})
+    return model.build_serving(load_artifact(path))
+
+
+@pytest.mark.parametrize('warmup_rounds, calls', [(0, 1), (1, 1), (3, 3)])
+def test_canary_scores_at_least_once(model, serving, tmp_path, warmup_rounds, calls):
+    classifier = CountingClassifier(serving.classifier)
+    watcher = RegistryWatcher(model, ModelRegistry(str(tmp_path)), warmup_rounds=warmup_rounds)
+
+    passed, accuracy = watcher.run_canary(serving._replace(classifier=classifier))
+
+    assert passed
+    assert accuracy >= watcher.min_canary_accuracy
+    assert classifier.calls == calls
+
+
+def test_canary_rejects_a_model_below_the_threshold(model, serving, tmp_path):
+    canaries = [(query, 'no_such_intent') for query, _ in RegistryWatcher(model, None).canaries_for(serving)]
+    watcher = RegistryWatcher(model, ModelRegistry(str(tmp_path)), canary_queries=canaries)
+
+    assert watcher.run_canary(serving) == (False, 0.0)
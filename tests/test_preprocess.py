@@ -0,0 +1,69 @@
+"""Parity between the single-pass preprocessor and the NLTK reference path"""
+
+import pytest
+
+from benchmark_preprocess import build_corpus
+from chatbot_model import ChatbotModel, TOKEN_SPLITS
+
+
+@pytest.fixture(scope='module')
+def plain():
+    return ChatbotModel(startup='lazy')
+
+
+@pytest.fixture(scope='module')
+def memoized():
+    return ChatbotModel(startup='lazy', preprocess_cache_size=4096)
+
+
+@pytest.fixture(scope='module', params=['plain', 'memoized'])
+def model(request):
+    return request.getfixturevalue(request.param)
+
+
+@pytest.fixture(scope='module')
+def corpus(plain):
+    return build_corpus(plain)
+
+
+def test_corpus_matches_nltk(model, corpus):
+    mismatches = [(text, model.preprocess_text(text), model.preprocess_text_nltk(text))
+                  for text in corpus
+                  if model.preprocess_text(text) != model.preprocess_text_nltk(text)]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('word', sorted(TOKEN_SPLITS))
+def test_token_splits_match_nltk(model, word):
+    for text in [word, word.upper(), f"i {word} find the library", f"{word}, {word}!"]:
+        assert model.preprocess_text(text) == model.preprocess_text_nltk(text)
+
+
+def test_non_string_input(model):
+    assert model.preprocess_text(12345) == model.preprocess_text_nltk(12345) == ''
+    assert model.preprocess_text(None) == model.preprocess_text_nltk(None)
+
+
+def test_memoized_results_are_stable(memoized, corpus):
+    first = [memoized.preprocess_text(text) for text in corpus]
+    hits = memoized._preprocess_cached.cache_info().hits
+    second = [memoized.preprocess_text(text) for text in corpus]
+
+    assert second == first
+    assert memoized._preprocess_cached.cache_info().hits >= hits + len(corpus)
+    assert first == [memoized.preprocess_text_nltk(text) for text in corpus]
+
+
+def test_reset_preprocess_cache_follows_stop_words(memoized):
+    text = "library timings for the exam hall"
+    before = memoized.preprocess_text(text)
+    stop_words = memoized.stop_words
+    try:
+        memoized.stop_words = set(stop_words) | {'library'}
+        memoized.reset_preprocess_cache()
+        assert 'library' not in memoized.preprocess_text(text).split()
+        assert memoized.preprocess_text(text) == memoized.preprocess_text_nltk(text)
+    finally:
+        memoized.stop_words = stop_words
+        memoized.reset_preprocess_cache()
+    assert memoized.preprocess_text(text) == before
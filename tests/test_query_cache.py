@@ -0,0 +1,41 @@
+"""QueryResultCache eviction and invalidation"""
+
+from query_cache import QueryResultCache
+
+
+def test_evicts_least_recently_used():
+    cache = QueryResultCache(maxsize=2)
+    cache.put('exam', 1)
+    cache.put('fees', 2)
+    cache.get('exam')
+    cache.put('library', 3)
+
+    assert cache.get('fees') is None
+    assert cache.get('exam') == 1
+    assert cache.get('library') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_put_after_clear_with_stale_generation_is_dropped():
+    cache = QueryResultCache()
+    generation = cache.generation
+    cache.clear()
+    cache.put('exam', ('old model', 0.9), generation)
+
+    assert cache.get('exam') is None
+
+    cache.put('exam', ('new model', 0.9), cache.generation)
+    assert cache.get('exam') == ('new model', 0.9)
+
+
+def test_put_without_generation_always_stores():
+    cache = QueryResultCache()
+    cache.clear()
+    cache.put('exam', 1)
+    assert cache.get('exam') == 1
+
+
+def test_zero_maxsize_disables_caching():
+    cache = QueryResultCache(maxsize=0)
+    cache.put('exam', 1, cache.generation)
+    assert cache.get('exam') is None
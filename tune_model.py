@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter search for the intent classifier
+
+Evaluates every candidate configuration with stratified k-fold
+cross-validation in a process pool, one (configuration, fold) task per
+job, so all cores are busy. The corpus is preprocessed once and handed to
+each worker process when it starts, never per fold. Configurations that
+meet the accuracy bar are then retrained on the whole corpus and measured
+for model size and per-query latency, and the fastest of them is chosen.
+
+    python tune_model.py --min-accuracy 0.85 --report tuning.json
+    python tune_model.py --search random --iterations 30 --save
+    python tune_model.py --alpha 0.05 0.1 0.5 --ngram 1,1 1,2 --vectorizer tfidf hashing
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from chatbot_model import ChatbotModel, build_tfidf_pipeline
+from compare_vectorizers import array_bytes, latency_us, stratified_folds
+from hashing_model import HashingIntentModel
+from inference_engine import NumpyIntentClassifier
+
+# Preprocessed corpus of a worker process, set by _init_worker
+_corpus = {}
+
+
+def parameter_grid(vectorizers, alphas, ngram_ranges, max_features, hashing_bits):
+    """Every configuration of the search space as a list of dictionaries"""
+    configs = []
+    for vectorizer, alpha, ngram_range in itertools.product(vectorizers, alphas, ngram_ranges):
+        if vectorizer == 'hashing':
+            widths = [{'n_features': 2 ** bits} for bits in hashing_bits]
+        else:
+            widths = [{'max_features': count} for count in max_features]
+        for width in widths:
+            configs.append({'vectorizer': vectorizer, 'alpha': alpha, 'ngram_range': ngram_range, **width})
+    return configs
+
+
+def describe(config):
+    width = (f"2^{int(np.log2(config['n_features']))}" if config['vectorizer'] == 'hashing'
+             else str(config['max_features']))
+    ngram = '-'.join(str(n) for n in config['ngram_range'])
+    return f"{config['vectorizer']:<8}alpha={config['alpha']:<6g}ngram={ngram:<5}width={width}"
+
+
+def fit_engine(config, texts, labels):
+    """
+    Train one configuration
+
+    Returns:
+        NumpyIntentClassifier scoring with the trained model
+    """
+    if config['vectorizer'] == 'hashing':
+        model = HashingIntentModel(n_features=config['n_features'], alpha=config['alpha'],
+                                   ngram_range=config['ngram_range'])
+        return model.fit(texts, labels).classifier
+
+    pipeline = build_tfidf_pipeline(max_features=config['max_features'],
+                                    ngram_range=tuple(config['ngram_range']), alpha=config['alpha'])
+    return NumpyIntentClassifier.from_pipeline(pipeline.fit(texts, labels))
+
+
+def _init_worker(texts, labels, assignment):
+    _corpus['texts'] = np.array(texts, dtype=object)
+    _corpus['labels'] = np.array(labels)
+    _corpus['assignment'] = assignment
+
+
+def _evaluate_fold(index, config, fold):
+    texts, labels, assignment = _corpus['texts'], _corpus['labels'], _corpus['assignment']
+    train, test = assignment != fold, assignment == fold
+    started = time.perf_counter()
+    engine = fit_engine(config, texts[train].tolist(), labels[train].tolist())
+    seconds = time.perf_counter() - started
+    return index, fold, engine.predict(texts[test].tolist()), seconds
+
+
+def f1_by_intent(expected, predicted):
+    """F1 score of every intent in expected"""
+    scores = {}
+    for label in sorted(set(expected)):
+        true_positive = np.sum((predicted == label) & (expected == label))
+        precision = true_positive / max(np.sum(predicted == label), 1)
+        recall = true_positive / max(np.sum(expected == label), 1)
+        scores[str(label)] = float(2 * precision * recall / (precision + recall)) if true_positive else 0.0
+    return scores
+
+
+def cross_validate(configs, texts, labels, folds=5, workers=None):
+    """
+    Score every configuration with stratified k-fold cross-validation
+
+    Returns:
+        One result dictionary per configuration, in the order given
+    """
+    labels = np.array(labels)
+    assignment = stratified_folds(labels, folds)
+    fold_numbers = [fold for fold in range(folds) if (assignment == fold).any()]
+
+    predictions = [np.empty(len(labels), dtype=labels.dtype) for _ in configs]
+    fold_accuracy = [[] for _ in configs]
+    train_seconds = [0.0 for _ in configs]
+
+    tasks = [(index, config, fold) for index, config in enumerate(configs) for fold in fold_numbers]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(texts, labels.tolist(), assignment)) as pool:
+        for index, fold, predicted, seconds in pool.map(_evaluate_fold, *zip(*tasks)):
+            test = assignment == fold
+            predictions[index][test] = predicted
+            fold_accuracy[index].append(float(np.mean(predicted == labels[test])))
+            train_seconds[index] += seconds
+
+    results = []
+    for index, config in enumerate(configs):
+        results.append({
+            'config': config,
+            'accuracy': float(np.mean(predictions[index] == labels)),
+            'fold_accuracy_std': float(np.std(fold_accuracy[index])),
+            'f1': f1_by_intent(labels, predictions[index]),
+            'train_seconds': train_seconds[index] / len(fold_numbers)
+        })
+    return results
+
+
+def measure(result, texts, labels, sample=200):
+    """Retrain a configuration on the whole corpus and add size and latency"""
+    engine = fit_engine(result['config'], texts, labels)
+    result['model_bytes'] = array_bytes(engine)
+    result['latency_us'] = latency_us(engine, texts[:sample])
+    return result
+
+
+def choose(results, min_accuracy=None):
+    """Fastest measured configuration meeting the bar, or the most accurate"""
+    if min_accuracy is not None:
+        passing = [result for result in results if result['accuracy'] >= min_accuracy and 'latency_us' in result]
+        if passing:
+            return min(passing, key=lambda result: result['latency_us'])
+    return max(results, key=lambda result: (result['accuracy'], -result.get('latency_us', 0.0)))
+
+
+def save_config(config, model_path):
+    """Train a configuration on the full training data and save its artifact"""
+    model = ChatbotModel(model_path=model_path, startup='lazy')
+    model.wait_until_ready(components=['nltk'])
+    model.load_training_data()
+    X, y = model.prepare_training_data()
+
+    if config['vectorizer'] == 'hashing':
+        model.model = HashingIntentModel(n_features=config['n_features'], alpha=config['alpha'],
+                                         ngram_range=config['ngram_range']).fit(X, y)
+        model.vectorizer = None
+    else:
+        model.model = build_tfidf_pipeline(max_features=config['max_features'],
+                                           ngram_range=tuple(config['ngram_range']), alpha=config['alpha']).fit(X, y)
+        model.vectorizer = model.model.named_steps['tfidf']
+    model.set_classifier()
+    model.save_model()
+
+
+def _ngram(value):
+    low, _, high = value.partition(',')
+    return (int(low), int(high or low))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vectorizer', nargs='+', choices=['tfidf', 'hashing'], default=['tfidf', 'hashing'])
+    parser.add_argument('--alpha', type=float, nargs='+', default=[0.01, 0.05, 0.1, 0.5, 1.0])
+    parser.add_argument('--ngram', type=_ngram, nargs='+', default=[(1, 1), (1, 2), (1, 3)],
+                        help='n-gram ranges such as 1,2')
+    parser.add_argument('--max-features', type=int, nargs='+', default=[500, 1500, 5000],
+                        help='TF-IDF vocabulary caps')
+    parser.add_argument('--hashing-bits', type=int, nargs='+', default=[14, 16],
+                        help='hashing widths, as powers of two')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--iterations', type=int, default=20, help='configurations sampled by random search')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--min-accuracy', type=float, help='accuracy bar; the fastest model above it is chosen')
+    parser.add_argument('--measure-top', type=int, default=5,
+                        help='without --min-accuracy, measure this many of the most accurate configurations')
+    parser.add_argument('--report', default='tuning_report.json', help='JSON report path')
+    parser.add_argument('--save', action='store_true', help='train and save the chosen configuration')
+    parser.add_argument('--model', default='chatbot_model', help='artifact directory written by --save')
+    args = parser.parse_args()
+
+    configs = parameter_grid(args.vectorizer, args.alpha, args.ngram, args.max_features, args.hashing_bits)
+    if args.search == 'random' and args.iterations < len(configs):
+        configs = random.Random(args.seed).sample(configs, args.iterations)
+
+    model = ChatbotModel(startup='lazy')
+    model.wait_until_ready(components=['nltk'])
+    model.load_training_data()
+    X, y = model.prepare_training_data()
+
+    print(f"Evaluating {len(configs)} configurations x {args.folds} folds on {args.workers} workers")
+    started = time.perf_counter()
+    results = cross_validate(configs, X, y, args.folds, args.workers)
+    search_seconds = time.perf_counter() - started
+
+    if args.min_accuracy is not None:
+        candidates = [result for result in results if result['accuracy'] >= args.min_accuracy]
+    else:
+        candidates = sorted(results, key=lambda result: result['accuracy'], reverse=True)[:args.measure_top]
+    for result in candidates:
+        measure(result, X, y)
+    best = choose(results, args.min_accuracy)
+    if 'latency_us' not in best:
+        measure(best, X, y)
+
+    print("=" * 86)
+    print("MODEL TUNING")
+    print("=" * 86)
+    print(f"{len(X)} samples, {len(set(y))} intents, {args.folds} stratified folds, {search_seconds:.1f}s\n")
+    print(f"{'Configuration':<44}{'Accuracy':>10}{'± std':>8}{'Macro F1':>10}{'KB':>7}{'µs':>7}")
+    print("-" * 86)
+    for result in sorted(results, key=lambda result: result['accuracy'], reverse=True):
+        macro_f1 = np.mean(list(result['f1'].values()))
+        size = f"{result['model_bytes'] / 1024:.0f}" if 'model_bytes' in result else '-'
+        latency = f"{result['latency_us']:.0f}" if 'latency_us' in result else '-'
+        marker = '*' if result is best else ' '
+        print(f"{marker}{describe(result['config']):<43}{result['accuracy']:>10.2%}"
+              f"{result['fold_accuracy_std']:>8.2%}{macro_f1:>10.2%}{size:>7}{latency:>7}")
+
+    print(f"\nChosen: {describe(best['config'])}")
+    print(f"{'Intent':<24}{'F1':>8}")
+    for intent, score in sorted(best['f1'].items(), key=lambda item: item[1]):
+        print(f"{intent:<24}{score:>8.2%}")
+    if args.min_accuracy is not None and best['accuracy'] < args.min_accuracy:
+        print(f"\n✗ No configuration reached {args.min_accuracy:.2%}; chose the most accurate")
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump({
+            'samples': len(X),
+            'intents': len(set(y)),
+            'folds': args.folds,
+            'search': args.search,
+            'search_seconds': search_seconds,
+            'min_accuracy': args.min_accuracy,
+            'chosen': best,
+            'results': results
+        }, f, indent=2)
+    print(f"\nReport written to {args.report}")
+
+    if args.save:
+        save_config(best['config'], args.model)
@@ -0,0 +1,21 @@
+"""
+Slim serving entry point
+
+    gunicorn wsgi:app
+
+Importing this module only builds the Flask app. Database setup and sample
+seeding happen on a background thread right after import, so the worker
+starts accepting connections immediately; a request that arrives before
+setup finishes waits for it. Run gunicorn without --preload so each worker
+does this after it has been forked.
+"""
+
+import os
+import threading
+
+os.environ.setdefault('CHATBOT_LAZY_INIT', '1')
+
+from app import app, get_chatbot
+
+if os.environ.get('CHATBOT_WARMUP', '1') == '1':
+    threading.Thread(target=get_chatbot, name='chatbot-warmup', daemon=True).start()